@@ -0,0 +1,49 @@
+"""
+Microbenchmark for BrowserCache with 100k entries.
+
+Run from the repository root with `make bench`, or directly:
+
+    PYTHONPATH=. python benchmarks/cache_benchmark.py
+"""
+import time
+from typing import Callable
+
+from src.networking.cache import BrowserCache
+from src.networking.headers import Headers
+from src.networking.response import Response
+
+ENTRIES = 100_000
+
+
+def bench(name: str, fn: Callable[[], object], operations: int):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<40} {elapsed * 1000:10.1f} ms {elapsed / operations * 1e9:8.0f} ns/op"
+    )
+
+
+def fill(cache: BrowserCache, keys: list, response: Response):
+    for key in keys:
+        cache.set(key, response, max_age=600)
+
+
+def hit(cache: BrowserCache, keys: list):
+    for key in keys:
+        cache.get(key)
+
+
+if __name__ == "__main__":
+    keys = [f"https://example.com/page/{idx}" for idx in range(ENTRIES)]
+    response = Response(200, "OK", Headers(), "<p>cached body</p>")
+
+    cache = BrowserCache(capacity=ENTRIES)
+    bench("set 100k entries", lambda: fill(cache, keys, response), ENTRIES)
+    bench("get 100k hits", lambda: hit(cache, keys), ENTRIES)
+    bench("update 100k entries", lambda: fill(cache, keys, response), ENTRIES)
+
+    cache = BrowserCache(capacity=ENTRIES // 2)
+    bench(
+        "set 100k entries, evicting half", lambda: fill(cache, keys, response), ENTRIES
+    )
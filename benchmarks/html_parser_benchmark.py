@@ -0,0 +1,125 @@
+"""
+Benchmarks for the HTML parser on large generated documents.
+
+Run from the repository root with `make bench`, or directly:
+
+    PYTHONPATH=. python benchmarks/html_parser_benchmark.py
+"""
+import time
+import tracemalloc
+from typing import Callable
+
+from src.parser.html_parser import HTMLParser
+from src.resolver.resolver import Resolver
+
+PARAGRAPH = (
+    "<p class=body>Lorem ipsum <b>dolor</b> sit amet, &amp; consectetur "
+    "<i>adipiscing</i> elit &mdash; sed do eiusmod tempor.</p>\n"
+)
+COMMENT = "<!-- generated comment with <p>markup</p> inside -->\n"
+
+
+class StringResolver(Resolver):
+    def __init__(self, document: str):
+        self.document = document
+
+    def resolve(self) -> str:
+        return self.document
+
+
+def generate_document(size: int) -> str:
+    """Build an HTML document of roughly `size` characters."""
+    unit = PARAGRAPH * 9 + COMMENT
+    body = unit * (size // len(unit) + 1)
+    return f"<!DOCTYPE html><html><head><title>Bench</title></head><body>{body}</body></html>"
+
+
+def generate_text_document(size: int) -> str:
+    """Build a document of roughly `size` characters made of long paragraphs."""
+    unit = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    body = (unit + "</p>\n") * (size // len(unit) + 1)
+    return f"<html><body>{body}</body></html>"
+
+
+LINK = (
+    '<a class="nav-link active" rel="noopener noreferrer" href="/docs/page?id=1&amp;x=2" '
+    "data-id=42 title='Go to the docs page' target=_blank hidden>Docs</a>\n"
+)
+
+
+def generate_attribute_document(size: int) -> str:
+    """Build a document of roughly `size` characters of attribute-heavy links."""
+    body = LINK * (size // len(LINK) + 1)
+    return f"<html><body>{body}</body></html>"
+
+
+SCRIPT = (
+    "<script>function f(a, b) { if (a < b && b > 0) { return '<div>' + a + "
+    "'</div>'; } return b; }\n" * 40 + "</script>\n"
+    "<style>p > b { color: red; } a:hover > span { color: blue; }</style>\n"
+)
+
+
+def generate_script_document(size: int) -> str:
+    """Build a document of roughly `size` characters, mostly script and style."""
+    unit = SCRIPT + PARAGRAPH
+    body = unit * (size // len(unit) + 1)
+    return f"<html><head><title>Bench</title></head><body>{body}</body></html>"
+
+
+def generate_nested_document(depth: int) -> str:
+    """Build a document with `depth` nested elements, each holding some text."""
+    return "<html><body>" + "<div>text " * depth + "</div>" * depth + "</body></html>"
+
+
+def parse(document: str, lazy_text: bool = False):
+    return HTMLParser(StringResolver(document), lazy_text=lazy_text).lex()
+
+
+def count_nodes(root) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def bench_memory(name: str, document: str, lazy_text: bool = False):
+    """Report the node count and the tracemalloc peak while parsing `document`."""
+    tracemalloc.start()
+    root = parse(document, lazy_text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(root.element)
+    print(f"{name:<40} {nodes:>8} nodes {peak / 1e6:10.1f} MB peak")
+
+
+def bench(name: str, fn: Callable[[], object], repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<40} {best * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    for size in (500_000, 2_000_000, 5_000_000):
+        document = generate_document(size)
+        bench(f"parse {len(document) / 1e6:.1f} MB", lambda: parse(document))
+    document = generate_script_document(5_000_000)
+    bench(f"parse {len(document) / 1e6:.1f} MB script-heavy", lambda: parse(document))
+    document = generate_attribute_document(5_000_000)
+    bench(
+        f"parse {len(document) / 1e6:.1f} MB attribute-heavy", lambda: parse(document)
+    )
+    for depth in (1_000, 10_000):
+        document = generate_nested_document(depth)
+        bench(f"parse {depth} nested elements", lambda: parse(document))
+    bench_memory("DOM memory", generate_document(3_300_000))
+    bench_memory("attribute-heavy DOM memory", generate_attribute_document(3_000_000))
+    document = generate_text_document(5_000_000)
+    bench_memory("text-heavy DOM memory", document)
+    bench_memory("text-heavy DOM memory (lazy text)", document, lazy_text=True)
@@ -0,0 +1,225 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from src.networking import happy_eyeballs
+from src.networking.connection_pool import ConnectionKey, ConnectionPool
+from src.networking.headers import Headers
+from src.networking.http_client import (
+    DEFAULT_TIMEOUT,
+    MAX_REDIRECT_COUNT,
+    REDIRECT_STATUSES,
+    REDIRECTS,
+    RequestTimeout,
+    redirect_target,
+)
+from src.networking.request import Request
+from src.networking.response import Response
+from src.networking.response_reader import (
+    add_header_line,
+    content_decoder,
+    has_body,
+    is_keep_alive,
+    is_trailer_end,
+    parse_chunk_size,
+    parse_status_line,
+    set_charset,
+)
+from src.networking.tls import shared_ssl_context
+from src.utils.url import URL, Scheme
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHTTPClient:
+    """
+    An HTTP/1.1 client on asyncio streams, so one event loop can drive many
+    fetches at once. Keep-alive connections are pooled per (scheme, host,
+    port), and at most `max_per_host` requests run against one origin at a
+    time; the rest wait for a slot. A client belongs to the event loop it is
+    first used on.
+    """
+
+    idle: Dict[ConnectionKey, List[Connection]]
+    limits: Dict[ConnectionKey, asyncio.Semaphore]
+    max_per_host: int
+    timeout: float
+    encoding: str
+
+    def __init__(
+        self,
+        max_per_host: int = 6,
+        timeout: float = DEFAULT_TIMEOUT,
+        encoding: str = "utf8",
+    ):
+        self.idle = {}
+        self.limits = {}
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.encoding = encoding
+
+    async def fetch(self, request: Request) -> Response:
+        """
+        Send the request, following redirects, and read the whole body. The
+        timeout covers the request end to end, including waiting for a slot.
+        """
+        try:
+            return await asyncio.wait_for(self._fetch(request), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise RequestTimeout(
+                f"Request to {request.url} timed out after {self.timeout:g}s"
+            ) from e
+
+    async def close(self):
+        idle, self.idle = self.idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                await self._close(connection)
+
+    def size(self) -> int:
+        return sum(len(connections) for connections in self.idle.values())
+
+    async def _fetch(self, request: Request) -> Response:
+        url = request.url
+        for _ in range(MAX_REDIRECT_COUNT + 1):
+            response = await self._exchange(request)
+            REDIRECTS.add_hsts(
+                url, response.headers.get_header("strict-transport-security")
+            )
+            if response.status_code not in REDIRECT_STATUSES:
+                return response
+            target = redirect_target(url, response)
+            REDIRECTS.add_redirect(url, target, response)
+            url = REDIRECTS.upgrade(target)
+            request = Request(url, headers=Headers.default(url.host))
+        raise Exception("Too many redirects")
+
+    async def _exchange(self, request: Request) -> Response:
+        key = ConnectionPool.key(request.url)
+        limit = self.limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            connection = self._acquire(key)
+            reused = connection is not None
+            if connection is None:
+                connection = await self._open(request.url)
+            try:
+                response, keep_alive = await self._send(connection, request)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                await self._close(connection)
+                if not reused:
+                    raise
+                # The server closed a pooled connection while it sat idle;
+                # retry once on a fresh one.
+                connection = await self._open(request.url)
+                try:
+                    response, keep_alive = await self._send(connection, request)
+                except BaseException:
+                    await self._close(connection)
+                    raise
+            except BaseException:
+                await self._close(connection)
+                raise
+
+            if keep_alive and len(self.idle.get(key, [])) < self.max_per_host:
+                self.idle.setdefault(key, []).append(connection)
+            else:
+                await self._close(connection)
+            return response
+
+    def _acquire(self, key: ConnectionKey) -> Optional[Connection]:
+        connections = self.idle.get(key)
+        while connections:
+            reader, writer = connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _open(self, url: URL) -> Connection:
+        if url.scheme == Scheme.HTTPS:
+            return await asyncio.open_connection(
+                url.host,
+                url.port,
+                ssl=shared_ssl_context(),
+                server_hostname=url.host,
+                happy_eyeballs_delay=happy_eyeballs.CONNECTION_ATTEMPT_DELAY,
+            )
+        return await asyncio.open_connection(
+            url.host,
+            url.port,
+            happy_eyeballs_delay=happy_eyeballs.CONNECTION_ATTEMPT_DELAY,
+        )
+
+    async def _close(self, connection: Connection):
+        _, writer = connection
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _send(
+        self, connection: Connection, request: Request
+    ) -> Tuple[Response, bool]:
+        """Send the request and read its response; also returns keep-alive."""
+        reader, writer = connection
+        writer.write(str(request).encode(self.encoding))
+        await writer.drain()
+
+        version, status, reason = parse_status_line(await reader.readline())
+        headers = Headers()
+        while add_header_line(headers, await reader.readline()):
+            pass
+        set_charset(headers)
+        response = Response(status, reason, headers, "")
+
+        body, complete = await self._read_body(reader, response)
+        response.body = body.decode(headers.encoding, errors="replace")
+        return response, complete and is_keep_alive(version, headers)
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, response: Response
+    ) -> Tuple[bytes, bool]:
+        """Read the body with its Content-Encoding removed, and whether it ended
+        where its framing said, leaving the connection reusable."""
+        if not has_body(response):
+            return b"", True
+        decoder = content_decoder(response)
+        chunks: List[bytes] = []
+
+        def add(data: bytes):
+            if decoder is None:
+                chunks.append(data)
+            else:
+                chunks.extend(decoder.decode(data))
+
+        transfer_encoding = response.headers.get_header("transfer-encoding")
+        content_length = response.headers.get_header("content-length")
+        complete = True
+        if transfer_encoding and transfer_encoding.lower().endswith("chunked"):
+            while True:
+                size = parse_chunk_size(await reader.readline())
+                if size is None:
+                    raise ConnectionError("Connection closed inside a chunked body")
+                if size == 0:
+                    break
+                add(await reader.readexactly(size))
+                # CRLF after the chunk data
+                await reader.readline()
+            # Skip trailer headers up to the final empty line
+            while True:
+                line = await reader.readline()
+                if is_trailer_end(line):
+                    break
+                if not line:
+                    complete = False
+                    break
+        elif content_length is not None:
+            add(await reader.readexactly(int(content_length)))
+        else:
+            # Delimited by the server closing the connection
+            add(await reader.read())
+            complete = False
+
+        if decoder is not None:
+            chunks.append(decoder.flush())
+        return b"".join(chunks), complete
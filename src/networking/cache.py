@@ -1,54 +1,134 @@
+import heapq
+import sys
+import threading
 import time
-from typing import Dict, List, Optional, TypedDict
+from collections import OrderedDict
+from typing import List, Optional, Tuple, TypedDict
 
+from src.networking.cache_control import CacheControl
 from src.networking.response import Response
 
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
 
 class CacheValue(TypedDict):
     value: Response
-    max_age: int
+    max_age: float
+    size: int
+
+
+def is_revalidatable(response: Response) -> bool:
+    """Whether a stale copy of the response can be revalidated with the server."""
+    return "etag" in response.headers or "last-modified" in response.headers
+
+
+def is_kept_when_stale(response: Response) -> bool:
+    """Whether an expired response is still useful to revalidate or serve stale."""
+    return is_revalidatable(response) or CacheControl.parse(
+        response.headers.get_header("cache-control")
+    ).has("stale-while-revalidate")
 
 
 class BrowserCache:
-    cache: Dict[str, CacheValue]
-    ordered_values: List[str]
+    """
+    An LRU cache of responses bounded by both entry count and total size.
+
+    Entries live in an OrderedDict kept in recency order, so hits, updates and
+    evictions are O(1). Expired entries are reaped lazily through a min-heap of
+    expiry times instead of scanning the whole cache. Expired entries carrying
+    an ETag or Last-Modified validator or a stale-while-revalidate directive
+    are kept as stale entries, so they can be revalidated or served while
+    refreshing instead of fetched again, until LRU eviction drops them.
+
+    Stale entries are refreshed from background threads, so every public
+    method holds a lock.
+    """
+
+    cache: "OrderedDict[str, CacheValue]"
+    expiry_heap: List[Tuple[float, str]]
     capacity: int
+    max_bytes: int
+    size_bytes: int
 
-    def __init__(self, capacity: int = 100):
-        self.cache = {}
-        self.ordered_values = []
+    def __init__(self, capacity: int = 100, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache = OrderedDict()
+        self.expiry_heap = []
         self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.lock = threading.Lock()
 
     def get(self, key: str) -> Optional[Response]:
-        cache_value = self.cache.get(key)
-        if cache_value and cache_value["max_age"] > time.time():
-            self.ordered_values.remove(key)
-            self.ordered_values.append(key)
-            return cache_value["value"]
-        elif cache_value:
-            self.ordered_values.remove(key)
-            del self.cache[key]
-        return None
+        with self.lock:
+            cache_value = self.cache.get(key)
+            if cache_value and cache_value["max_age"] > time.time():
+                self.cache.move_to_end(key)
+                return cache_value["value"]
+            elif cache_value and not is_kept_when_stale(cache_value["value"]):
+                self._remove(key)
+            return None
+
+    def get_stale(self, key: str) -> Optional[CacheValue]:
+        """Return the entry for `key` whether or not it is still fresh."""
+        with self.lock:
+            cache_value = self.cache.get(key)
+            if cache_value is not None:
+                self.cache.move_to_end(key)
+            return cache_value
 
     def set(self, key: str, value: Response, max_age: int = 60):
-        if key in self.cache:
-            self.ordered_values.remove(key)
-        elif self.get_capacity() >= self.capacity:
-            self.evict()
-        self.ordered_values.append(key)
-        self.cache[key] = {"value": value, "max_age": int(time.time()) + max_age}
+        size = self._size_of(value)
+        with self.lock:
+            if key in self.cache:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Caching it would evict everything else and still not fit
+                return
+            expires_at = time.time() + max_age
+            self.cache[key] = {"value": value, "max_age": expires_at, "size": size}
+            self.size_bytes += size
+            heapq.heappush(self.expiry_heap, (expires_at, key))
+            self._evict()
 
     def evict(self):
-        current_time = time.time()
-        self.cache = {
-            key: value
-            for key, value in self.cache.items()
-            if value["max_age"] > current_time
-        }
-        self.ordered_values = [key for key in self.ordered_values if key in self.cache]
-        if self.get_capacity() >= self.capacity:
-            key = self.ordered_values.pop(0)
-            del self.cache[key]
+        with self.lock:
+            self._evict()
 
     def get_capacity(self) -> int:
         return len(self.cache)
+
+    def _evict(self):
+        self._reap_expired()
+        while len(self.cache) > self.capacity or self.size_bytes > self.max_bytes:
+            key, cache_value = self.cache.popitem(last=False)
+            self.size_bytes -= cache_value["size"]
+
+    def _remove(self, key: str):
+        # The entry's heap record is left behind and skipped when reaped
+        cache_value = self.cache.pop(key)
+        self.size_bytes -= cache_value["size"]
+
+    def _reap_expired(self):
+        now = time.time()
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self.expiry_heap)
+            cache_value = self.cache.get(key)
+            # Skip records for entries that were replaced or removed since,
+            # and keep stale entries that are still useful
+            if (
+                cache_value
+                and cache_value["max_age"] == expires_at
+                and not is_kept_when_stale(cache_value["value"])
+            ):
+                self._remove(key)
+        if len(self.expiry_heap) > 2 * len(self.cache) + 64:
+            # Too many stale records; rebuild from the live entries
+            self.expiry_heap = [
+                (cache_value["max_age"], key) for key, cache_value in self.cache.items()
+            ]
+            heapq.heapify(self.expiry_heap)
+
+    def _size_of(self, value: Response) -> int:
+        return sys.getsizeof(value.body) + sum(
+            len(header) + len(header_value) for header, header_value in value.headers
+        )
@@ -0,0 +1,85 @@
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from src.networking.headers import Headers
+
+# A directive name, optionally followed by a token or quoted-string argument
+DIRECTIVE = re.compile(
+    r"([!#$%&'*+\-.^_`|~0-9A-Za-z]+)(?:\s*=\s*(\"(?:[^\"\\]|\\.)*\"|[^,\s]*))?"
+)
+
+
+class CacheControl:
+    """
+    The directives of a Cache-Control header. As a private browser cache,
+    `private` responses may be stored, and `s-maxage` is ignored.
+    """
+
+    directives: Dict[str, Optional[str]]
+
+    def __init__(self, directives: Optional[Dict[str, Optional[str]]] = None):
+        self.directives = directives if directives is not None else {}
+
+    def has(self, directive: str) -> bool:
+        return directive in self.directives
+
+    def seconds(self, directive: str) -> Optional[int]:
+        """The delta-seconds argument of a directive, if present and valid."""
+        return parse_delta_seconds(self.directives.get(directive))
+
+    @staticmethod
+    def parse(header: Optional[str]) -> "CacheControl":
+        directives: Dict[str, Optional[str]] = {}
+        for match in DIRECTIVE.finditer(header or ""):
+            name, value = match.group(1).lower(), match.group(2)
+            if value and value.startswith('"'):
+                value = re.sub(r"\\(.)", r"\1", value[1:-1])
+            # The first occurrence of a duplicated directive wins
+            directives.setdefault(name, value)
+        return CacheControl(directives)
+
+
+def parse_delta_seconds(value: Optional[str]) -> Optional[int]:
+    if value is None or not value.strip().isdigit():
+        return None
+    return int(value)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(
+    headers: Headers, response_time: Optional[float] = None
+) -> Optional[int]:
+    """
+    Seconds a response received at `response_time` stays fresh, from its
+    Cache-Control max-age or Expires header less its current Age. Returns
+    None when the response carries no explicit freshness information.
+    """
+    response_time = time.time() if response_time is None else response_time
+    cache_control = CacheControl.parse(headers.get_header("cache-control"))
+    date = parse_http_date(headers.get_header("date"))
+
+    if cache_control.has("no-cache"):
+        return 0
+    if cache_control.has("max-age"):
+        # An invalid max-age makes the response stale
+        lifetime = float(cache_control.seconds("max-age") or 0)
+    elif "expires" in headers:
+        # An invalid date, such as "0", means already expired
+        expires = parse_http_date(headers.get_header("expires"))
+        lifetime = expires - (date or response_time) if expires else 0.0
+    else:
+        return None
+
+    apparent_age = max(0.0, response_time - date) if date else 0.0
+    age = parse_delta_seconds(headers.get_header("age")) or 0
+    return max(0, int(lifetime - max(apparent_age, age)))
@@ -0,0 +1,93 @@
+import select
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.url import URL, Scheme
+
+ConnectionKey = Tuple[Scheme, str, int]
+
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections, keyed by (scheme, host, port), so repeat
+    requests to the same origin skip the TCP (and TLS) handshake.
+    """
+
+    idle: Dict[ConnectionKey, List[Tuple[socket.socket, float]]]
+    max_idle_per_host: int
+    idle_timeout: float
+
+    def __init__(self, max_idle_per_host: int = 6, idle_timeout: float = 30.0):
+        self.idle = {}
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(url: URL) -> ConnectionKey:
+        return (url.scheme, url.host, url.port)
+
+    def acquire(self, key: ConnectionKey) -> Optional[socket.socket]:
+        """Return an idle connection for `key`, or None if there is none."""
+        now = time.monotonic()
+        while True:
+            with self.lock:
+                connections = self.idle.get(key)
+                if not connections:
+                    return None
+                # Most recently released first, it's the least likely to be stale
+                s, released_at = connections.pop()
+                if not connections:
+                    del self.idle[key]
+            if now - released_at < self.idle_timeout and self._is_alive(s):
+                return s
+            s.close()
+
+    def release(self, key: ConnectionKey, s: socket.socket):
+        """Return a connection whose response has been fully read."""
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append((s, time.monotonic()))
+                return
+        s.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for connections in idle.values():
+            for s, _ in connections:
+                s.close()
+
+    def size(self) -> int:
+        with self.lock:
+            return sum(len(connections) for connections in self.idle.values())
+
+    def _is_alive(self, s: socket.socket) -> bool:
+        # An idle connection should have nothing to read. If it is readable,
+        # the server closed it (or sent something unexpected), so drop it.
+        try:
+            readable, _, _ = select.select([s], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        if readable and isinstance(s, ssl.SSLSocket):
+            # TLS 1.3 session tickets arrive after the handshake, so a
+            # connection that never carried a request is readable too
+            return self._only_tls_records(s)
+        return not readable
+
+    def _only_tls_records(self, s: ssl.SSLSocket) -> bool:
+        s.setblocking(False)
+        try:
+            s.recv(1)
+        except ssl.SSLWantReadError:
+            return True
+        except (OSError, ValueError):
+            return False
+        finally:
+            s.setblocking(True)
+        # Application data or EOF
+        return False
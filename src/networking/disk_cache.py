@@ -0,0 +1,315 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from src.networking.cache import CacheValue, is_kept_when_stale
+from src.networking.headers import Headers
+from src.networking.response import Response
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bodies are written under this suffix and renamed into place once complete
+TMP_SUFFIX = ".tmp"
+# Temporary bodies older than this were left by a crash; younger ones may
+# still be in the middle of a write by another session
+STALE_TMP_SECONDS = 60
+
+# Bump when the entries table changes; older indexes are discarded
+INDEX_VERSION = 2
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status_code INTEGER NOT NULL,
+    reason_phrase TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    kept_when_stale INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+# Writes look up rows by body and sweep expired rows without a table scan
+INDEX_LOOKUPS = (
+    "CREATE INDEX IF NOT EXISTS entries_body_hash ON entries (body_hash)",
+    "CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)",
+)
+
+
+def default_cache_directory() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "browser-engineering")
+
+
+class DiskCache:
+    """
+    A persistent response cache shared across browser sessions.
+
+    Bodies are stored once per distinct content under their SHA-256 and read
+    back through mmap. A sqlite index maps each URL to its body, expiry and
+    validators; expired entries that can be revalidated or served while
+    revalidating are kept. Bodies are written to a temporary file, fsynced
+    and renamed into place before the index row is committed, so a crash
+    never leaves an index entry pointing at a partial body. Temporary files
+    a crash leaves behind are removed on the next start.
+
+    Writes fsync, so `set` queues them on a background writer and returns;
+    a `get` for a key with a queued write waits for it. The total size of
+    the bodies is kept as a running count, so eviction doesn't re-aggregate
+    the index on every write.
+    """
+
+    directory: str
+    max_bytes: int
+    total_bytes: int
+    pending: Dict[str, Future]
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bodies_directory = os.path.join(directory, "bodies")
+        os.makedirs(self.bodies_directory, exist_ok=True)
+        self._remove_stale_temporary_files()
+        self.lock = threading.Lock()
+        self.index = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False
+        )
+        with self.index:
+            (version,) = self.index.execute("PRAGMA user_version").fetchone()
+            if version != INDEX_VERSION:
+                self.index.execute("DROP TABLE IF EXISTS entries")
+                self.index.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self.index.execute(INDEX_SCHEMA)
+            for statement in INDEX_LOOKUPS:
+                self.index.execute(statement)
+        self.total_bytes = self._size_bytes()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="disk-cache-writer"
+        )
+
+    def get(self, key: str) -> Optional[CacheValue]:
+        return self._get(key, allow_stale=False)
+
+    def get_stale(self, key: str) -> Optional[CacheValue]:
+        """Return the entry for `key` whether or not it is still fresh."""
+        return self._get(key, allow_stale=True)
+
+    def set(self, key: str, value: Response, max_age: int = 60):
+        """Queue `value` to be stored under `key` on the background writer."""
+        future = self.writer.submit(self._store, key, value, max_age, time.time())
+        with self.pending_lock:
+            self.pending[key] = future
+        future.add_done_callback(lambda done: self._forget_write(key, done))
+
+    def flush(self):
+        """Wait for every queued write to finish."""
+        # The writer has one worker, so this runs after everything before it
+        self.writer.submit(lambda: None).result()
+
+    def _forget_write(self, key: str, future: Future):
+        with self.pending_lock:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+    def _wait_for_write(self, key: str):
+        with self.pending_lock:
+            future = self.pending.get(key)
+        if future is not None:
+            # A failed write just leaves the previous entry, if any
+            wait([future])
+
+    def _store(self, key: str, value: Response, max_age: int, now: float):
+        body = value.body.encode("utf8")
+        if len(body) > self.max_bytes:
+            return
+        body_hash = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            self._write_body(body_hash, body)
+            previous = self.index.execute(
+                "SELECT body_hash, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if not self._is_referenced(body_hash):
+                self.total_bytes += len(body)
+            with self.index:
+                self.index.execute(
+                    "INSERT OR REPLACE INTO entries VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        body_hash,
+                        len(body),
+                        value.status_code,
+                        value.reason_phrase,
+                        json.dumps(dict(value.headers)),
+                        value.headers.get_header("etag"),
+                        value.headers.get_header("last-modified"),
+                        is_kept_when_stale(value),
+                        now + max_age,
+                        now,
+                    ),
+                )
+            if previous and previous[0] != body_hash:
+                self._remove_unreferenced_body(*previous)
+            self._evict()
+
+    def _get(self, key: str, allow_stale: bool) -> Optional[CacheValue]:
+        self._wait_for_write(key)
+        with self.lock:
+            row = self.index.execute(
+                "SELECT body_hash, size, status_code, reason_phrase, headers, "
+                "kept_when_stale, expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            (
+                body_hash,
+                size,
+                status_code,
+                reason_phrase,
+                headers,
+                kept_when_stale,
+                expires_at,
+            ) = row
+            if expires_at <= time.time() and not allow_stale:
+                if not kept_when_stale:
+                    self._delete(key, body_hash, size)
+                return None
+            body = self._read_body(body_hash)
+            if body is None:
+                # The body file went missing; drop the dangling entry
+                self._delete(key, body_hash, size)
+                return None
+            with self.index:
+                self.index.execute(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+        response = Response(
+            status_code, reason_phrase, Headers(json.loads(headers)), body
+        )
+        return {"value": response, "max_age": expires_at, "size": size}
+
+    def size_bytes(self) -> int:
+        """Total size of the distinct bodies on disk, once queued writes finish."""
+        self.flush()
+        with self.lock:
+            return self.total_bytes
+
+    def close(self):
+        self.writer.shutdown(wait=True)
+        self.index.close()
+
+    def _size_bytes(self) -> int:
+        (total,) = self.index.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT DISTINCT body_hash, size FROM entries)"
+        ).fetchone()
+        return total
+
+    def _evict(self):
+        # Useful stale entries stay until the byte budget pushes them out
+        now = time.time()
+        for key, body_hash, size in self.index.execute(
+            "SELECT key, body_hash, size FROM entries "
+            "WHERE expires_at <= ? AND NOT kept_when_stale",
+            (now,),
+        ).fetchall():
+            self._delete(key, body_hash, size)
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Least recently used first
+        for key, body_hash, size in self.index.execute(
+            "SELECT key, body_hash, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._delete(key, body_hash, size)
+
+    def _delete(self, key: str, body_hash: str, size: int):
+        with self.index:
+            self.index.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._remove_unreferenced_body(body_hash, size)
+
+    def _is_referenced(self, body_hash: str) -> bool:
+        referenced = self.index.execute(
+            "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)
+        ).fetchone()
+        return referenced is not None
+
+    def _remove_unreferenced_body(self, body_hash: str, size: int):
+        if self._is_referenced(body_hash):
+            return
+        self.total_bytes -= size
+        try:
+            os.remove(self._body_path(body_hash))
+        except FileNotFoundError:
+            pass
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.bodies_directory, body_hash)
+
+    def _write_body(self, body_hash: str, body: bytes):
+        path = self._body_path(body_hash)
+        if os.path.exists(path):
+            # Content-addressed, so an existing file already holds this body
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.bodies_directory, suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        # The rename is only durable once the directory entry is on disk
+        self._fsync_directory(self.bodies_directory)
+
+    def _fsync_directory(self, directory: str):
+        if not hasattr(os, "O_DIRECTORY"):
+            # Windows can't open directories; NTFS journals renames anyway
+            return
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _remove_stale_temporary_files(self):
+        now = time.time()
+        with os.scandir(self.bodies_directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(TMP_SUFFIX):
+                    continue
+                try:
+                    if now - entry.stat().st_mtime > STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _read_body(self, body_hash: str) -> Optional[str]:
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return ""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return str(data, "utf8")
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,55 @@
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Tuple, cast
+
+AddressInfo = Tuple[socket.AddressFamily, socket.SocketKind, int, str, Any]
+
+
+class DNSCache:
+    """
+    getaddrinfo results per (host, port), kept for `ttl` seconds so repeat
+    connections skip the name lookup. getaddrinfo does not expose record
+    TTLs, so a fixed, short lifetime is used instead. Failed lookups are not
+    cached.
+    """
+
+    entries: Dict[Tuple[str, int], Tuple[List[AddressInfo], float]]
+    ttl: float
+    max_entries: int
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        self.entries = {}
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[AddressInfo]:
+        key = (host, port)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+        # typeshed narrows each tuple by family, which List doesn't accept
+        addresses = cast(
+            List[AddressInfo],
+            socket.getaddrinfo(
+                host, port, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP
+            ),
+        )
+        with self.lock:
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest lookup
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = (addresses, now + self.ttl)
+        return addresses
+
+    def remove(self, host: str, port: int):
+        with self.lock:
+            self.entries.pop((host, port), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
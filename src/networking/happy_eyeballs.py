@@ -0,0 +1,87 @@
+import errno
+import os
+import selectors
+import socket
+import time
+from typing import Dict, List, Optional, cast
+
+from src.networking.dns_cache import AddressInfo
+
+# RFC 8305 recommends 250 ms between connection attempts
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN}
+
+
+def interleave_families(addresses: List[AddressInfo]) -> List[AddressInfo]:
+    """
+    Order addresses so consecutive attempts alternate between address
+    families, starting with the family getaddrinfo preferred.
+    """
+    by_family: Dict[socket.AddressFamily, List[AddressInfo]] = {}
+    for address in addresses:
+        by_family.setdefault(address[0], []).append(address)
+    queues = list(by_family.values())
+    interleaved = []
+    for idx in range(max((len(queue) for queue in queues), default=0)):
+        for queue in queues:
+            if idx < len(queue):
+                interleaved.append(queue[idx])
+    return interleaved
+
+
+def connect(
+    addresses: List[AddressInfo],
+    deadline: float,
+    attempt_delay: float = CONNECTION_ATTEMPT_DELAY,
+) -> socket.socket:
+    """
+    Connect to the first of `addresses` that answers, racing them as in
+    RFC 8305: a new attempt starts every `attempt_delay` seconds, or as soon
+    as one fails, without abandoning the ones still in flight. The losers are
+    closed. Raises socket.timeout once the monotonic `deadline` passes, or
+    the last connection error if every address fails.
+    """
+    pending = interleave_families(addresses)
+    pending.reverse()
+    selector = selectors.DefaultSelector()
+    error: Optional[OSError] = None
+    next_attempt_at = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                raise socket.timeout("Timed out connecting")
+            if pending and now >= next_attempt_at:
+                family, kind, proto, _, address = pending.pop()
+                s = socket.socket(family, kind, proto)
+                s.setblocking(False)
+                code = s.connect_ex(address)
+                if code == 0:
+                    return s
+                elif code in IN_PROGRESS:
+                    selector.register(s, selectors.EVENT_WRITE)
+                    next_attempt_at = now + attempt_delay
+                else:
+                    s.close()
+                    error = OSError(code, os.strerror(code))
+                continue
+            if not pending and not selector.get_map():
+                raise error or OSError("No addresses to connect to")
+
+            wake_at = min(deadline, next_attempt_at) if pending else deadline
+            for key, _ in selector.select(max(0.0, wake_at - now)):
+                s = cast(socket.socket, key.fileobj)
+                selector.unregister(s)
+                code = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code == 0:
+                    return s
+                s.close()
+                error = OSError(code, os.strerror(code))
+                # Start the next attempt straight away instead of waiting
+                next_attempt_at = time.monotonic()
+    finally:
+        # Close every attempt that lost the race
+        for key in list(selector.get_map().values()):
+            cast(socket.socket, key.fileobj).close()
+        selector.close()
@@ -1,14 +1,21 @@
 from typing import Optional
 
+# Content codings we advertise in Accept-Encoding and know how to decode
+SUPPORTED_CONTENT_ENCODINGS = ("gzip", "deflate")
+
 
 class Headers:
-    def __init__(self, headers: dict = {}):
-        self.headers = headers
+    def __init__(self, headers: Optional[dict] = None):
+        # A shared default dict would leak headers between every instance
+        self.headers = headers if headers is not None else {}
         self.encoding = "utf8"
 
     def __iter__(self):
         return iter(self.headers.items())
 
+    def __contains__(self, header: str) -> bool:
+        return header.lower() in self.headers
+
     def add_header(self, header: str, value: str):
         self.headers[header.lower()] = value.strip()
 
@@ -38,6 +45,7 @@ class Headers:
         headers = Headers()
         headers.add_header("host", host)
         headers.add_header("user-agent", "browser-engineering")
-        headers.add_header("connection", "close")
+        headers.add_header("connection", "keep-alive")
         headers.add_header("accept", "*/*")
+        headers.add_header("accept-encoding", ", ".join(SUPPORTED_CONTENT_ENCODINGS))
         return headers
@@ -1,86 +1,279 @@
+import codecs
+import io
 import socket
 import ssl
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
+from src.networking import happy_eyeballs
+from src.networking.connection_pool import ConnectionPool
+from src.networking.dns_cache import DNSCache
 from src.networking.headers import Headers
+from src.networking.redirect_cache import RedirectCache
 from src.networking.request import Request
 from src.networking.response import Response
+from src.networking.response_reader import (
+    READ_CHUNK_SIZE,
+    ResponseReader,
+    is_keep_alive,
+)
+from src.networking.tls import TLSSessionCache, shared_ssl_context
 from src.utils.url import URL, Scheme
 
-REDIRECT_STATUSES = {301, 302}
+REDIRECT_STATUSES = {301, 302, 307, 308}
 
 MAX_REDIRECT_COUNT = 10
 
+# Seconds a request may take end to end: connect, TLS, headers and body.
+# Time the caller spends on streamed body chunks doesn't count.
+DEFAULT_TIMEOUT = 30.0
+
+# Shared by every client in the process, so connections that cannot come
+# from the pool still skip the name lookup and most of the TLS handshake
+DNS_CACHE = DNSCache()
+TLS_SESSIONS = TLSSessionCache()
+REDIRECTS = RedirectCache()
+
+
+class RequestTimeout(TimeoutError):
+    """Raised when a request does not complete before its deadline."""
+
+
+def redirect_target(url: URL, response: Response) -> URL:
+    """The URL a redirect response points to, relative to `url`."""
+    location = response.headers.get_header("location")
+    if location is None:
+        raise ValueError(f"Redirect from {url} has no Location header")
+    return url.resolve(location)
+
 
 class HTTPClient:
     url: URL
     encoding: str
     s: socket.socket
+    response_file: Optional[io.BufferedReader]
+    response: Response
+    reader: ResponseReader
+    pool: Optional[ConnectionPool]
+    reused_connection: bool
+    keep_alive: bool
+    released: bool
+    timeout: float
+    # time.monotonic() value by which the whole request must be done; moved
+    # on by the time the caller holds each streamed chunk
+    deadline: float
 
-    def __init__(self, url: URL, encoding: str = "utf8"):
+    def __init__(
+        self,
+        url: URL,
+        encoding: str = "utf8",
+        pool: Optional[ConnectionPool] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
         self.url = url
         self.encoding = encoding
-        self.s = self._create_socket()
+        self.pool = pool
+        self.keep_alive = False
+        self.response_file = None
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        with self._within_deadline():
+            self.s = self._connect()
+
+    @contextmanager
+    def _within_deadline(self):
+        try:
+            yield
+        except socket.timeout as e:
+            raise RequestTimeout(
+                f"Request to {self.url} timed out after {self.timeout:g}s"
+            ) from e
+
+    def _remaining(self) -> float:
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("Deadline passed")
+        return remaining
+
+    def _arm_timeout(self):
+        """Bound the next blocking socket operation by the time left."""
+        self.s.settimeout(self._remaining())
+
+    def _connect(self) -> socket.socket:
+        s = self.pool.acquire(ConnectionPool.key(self.url)) if self.pool else None
+        self.reused_connection = s is not None
+        self.released = False
+        return s if s is not None else self._create_socket()
 
     def _create_socket(self) -> socket.socket:
-        s = socket.socket(
-            family=socket.AF_INET, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP
-        )
-        if self.url.scheme == Scheme.HTTPS:
-            ctx = ssl.create_default_context()
-            s = ctx.wrap_socket(s, server_hostname=self.url.host)
-        s.connect((self.url.host, self.url.port))
+        s = self._connect_tcp()
+        try:
+            s.settimeout(self._remaining())
+            if self.url.scheme == Scheme.HTTPS:
+                # Resume the last session with this host to abbreviate the
+                # handshake
+                session = TLS_SESSIONS.get(self.url.host, self.url.port)
+                s = shared_ssl_context().wrap_socket(
+                    s, server_hostname=self.url.host, session=session
+                )
+        except (OSError, ValueError):
+            s.close()
+            raise
         return s
 
+    def _connect_tcp(self) -> socket.socket:
+        addresses = DNS_CACHE.resolve(self.url.host, self.url.port)
+        try:
+            return happy_eyeballs.connect(addresses, self.deadline)
+        except socket.timeout:
+            raise
+        except OSError:
+            # The cached addresses may be out of date; look them up again next time
+            DNS_CACHE.remove(self.url.host, self.url.port)
+            raise
+
     def _parse_redirect(self, response: Response) -> URL:
-        location = response.headers.get_header("location")
-        if location.startswith("/"):
-            return URL(f"{self.url.scheme}://{self.url.host}{location}")
-        else:
-            return URL(location)
+        return redirect_target(self.url, response)
 
     def _handle_redirect(self, response: Response) -> Response:
         for _ in range(MAX_REDIRECT_COUNT):
             if response.status_code not in REDIRECT_STATUSES:
                 break
             else:
-                self.s.close()
-                self.url = self._parse_redirect(response)
-                self.s = self._create_socket()
-                request = Request(self.url, headers=response.headers)
-                self.s.send((str(request)).encode(self.encoding))
-                response = self._parse_response()
+                # Drain the redirect body so the connection can go back to
+                # the pool before following the next hop.
+                for _ in self.reader.iter_body(response):
+                    pass
+                self._release()
+                target = self._parse_redirect(response)
+                REDIRECTS.add_redirect(self.url, target, response)
+                self.url = REDIRECTS.upgrade(target)
+                self.s = self._connect()
+                request = Request(self.url, headers=Headers.default(self.url.host))
+                response = self._exchange(request)
         if response.status_code in REDIRECT_STATUSES:
             raise Exception("Too many redirects")
         return response
 
+    def preconnect(self):
+        """Leave the connection opened for this URL idle in the pool, unused."""
+        if self.pool is None:
+            self.s.close()
+            return
+        self.pool.release(ConnectionPool.key(self.url), self.s)
+        self.released = True
+
     def send_request(self, request: Request) -> Response:
-        self.s.send((str(request)).encode(self.encoding))
-        response = self._parse_response()
+        response = self.start_request(request)
+        response.body = self.read_body()
+        return response
 
-        if response.status_code in REDIRECT_STATUSES:
-            response = self._handle_redirect(response)
+    def start_request(self, request: Request) -> Response:
+        """
+        Send the request and read the status line and headers, following
+        redirects. The returned response has an empty body; read it with
+        iter_body().
+        """
+        with self._within_deadline():
+            response = self._exchange(request)
 
-        self.s.close()
+            if response.status_code in REDIRECT_STATUSES:
+                response = self._handle_redirect(response)
+        self.response = response
         return response
 
-    def _parse_response(self) -> Response:
-        response_file = self.s.makefile("r", encoding=self.encoding, newline="\r\n")
-        statusline = response_file.readline()
-        version, status, explanation = statusline.split(" ", 2)
-
-        response_headers = self._read_headers(response_file)
+    def _exchange(self, request: Request) -> Response:
+        try:
+            self._arm_timeout()
+            self.s.sendall((str(request)).encode(self.encoding))
+            return self._parse_response()
+        except (ConnectionError, ValueError):
+            if not self.reused_connection:
+                raise
+        # The server closed a pooled connection while it sat idle; retry once
+        # on a fresh one.
+        self._close_response_file()
+        self.s.close()
+        self.s = self._create_socket()
+        self.reused_connection = False
+        self._arm_timeout()
+        self.s.sendall((str(request)).encode(self.encoding))
+        return self._parse_response()
 
-        response = Response(
-            int(status), explanation, response_headers, response_file.read()
+    def iter_body(self, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Yield the body as text while it streams in, decoded with the charset
+        from the response's Content-Type. The clock stops while a chunk is
+        yielded, so a slow consumer doesn't use up the request's deadline.
+        """
+        decoder = codecs.getincrementaldecoder(self.response.headers.encoding)(
+            errors="replace"
         )
-        return response
+        try:
+            with self._within_deadline():
+                self._arm_timeout()
+                for data in self.reader.iter_content(self.response, chunk_size):
+                    text = decoder.decode(data)
+                    if text:
+                        yielded_at = time.monotonic()
+                        yield text
+                        self.deadline += time.monotonic() - yielded_at
+                    self._arm_timeout()
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield text
+            self._release()
+        finally:
+            self.close()
 
-    def _read_headers(self, response_file) -> Headers:
-        headers = Headers()
-        while True:
-            line = response_file.readline()
-            if line == "\r\n":
-                break
-            header, value = line.split(":", 1)
-            headers.add_header(header.strip(), value.strip())
-        return headers
+    def read_body(self) -> str:
+        """Read the whole body as bytes and decode it once at the end."""
+        chunks = []
+        try:
+            with self._within_deadline():
+                self._arm_timeout()
+                for data in self.reader.iter_content(self.response):
+                    chunks.append(data)
+                    self._arm_timeout()
+            self._release()
+        finally:
+            self.close()
+        return b"".join(chunks).decode(self.response.headers.encoding, errors="replace")
+
+    def _release(self):
+        """Hand the connection back to the pool, or close it if it can't be reused."""
+        self._close_response_file()
+        if self.pool is not None and self.keep_alive and self.reader.complete:
+            self.pool.release(ConnectionPool.key(self.url), self.s)
+            self.released = True
+        else:
+            self.s.close()
+        self.keep_alive = False
+
+    def close(self):
+        self._close_response_file()
+        if not self.released:
+            self.s.close()
+
+    def _close_response_file(self):
+        # Closing the file only drops its reference to the socket
+        if self.response_file is not None:
+            self.response_file.close()
+            self.response_file = None
+
+    def _parse_response(self) -> Response:
+        self._close_response_file()
+        self.response_file = self.s.makefile("rb")
+        self.reader = ResponseReader(self.response_file)
+        response = self.reader.read_response_head()
+        if isinstance(self.s, ssl.SSLSocket):
+            # TLS 1.3 tickets arrive after the handshake, so save it once
+            # response data has been read
+            TLS_SESSIONS.set(self.url.host, self.url.port, self.s.session)
+            REDIRECTS.add_hsts(
+                self.url, response.headers.get_header("strict-transport-security")
+            )
+
+        self.keep_alive = is_keep_alive(self.reader.version, response.headers)
+        return response
@@ -0,0 +1,124 @@
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.networking.cache_control import CacheControl, freshness_lifetime
+from src.networking.response import Response
+from src.utils.url import URL, Scheme
+
+PERMANENT_REDIRECT_STATUSES = {301, 308}
+
+MAX_CACHED_HOPS = 10
+
+
+class RedirectCache:
+    """
+    Remembers permanent redirects per URL and HSTS upgrades per host, so
+    later loads go straight to the final URL instead of paying a round trip
+    for every hop.
+
+    Permanent redirects are kept until their explicit freshness runs out, or
+    indefinitely when they have none, within an LRU bound on the number of
+    entries.
+    """
+
+    redirects: "OrderedDict[str, Tuple[str, float]]"
+    # host -> (expires at, include subdomains)
+    hsts_hosts: Dict[str, Tuple[float, bool]]
+    max_entries: int
+
+    def __init__(self, max_entries: int = 1024):
+        self.redirects = OrderedDict()
+        self.hsts_hosts = {}
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def resolve(self, url: URL) -> URL:
+        """Follow cached redirects and HSTS upgrades from `url`."""
+        url = self.upgrade(url)
+        seen = {str(url)}
+        for _ in range(MAX_CACHED_HOPS):
+            target = self._get(str(url))
+            if target is None or target in seen:
+                break
+            seen.add(target)
+            url = self.upgrade(URL(target))
+        return url
+
+    def add_redirect(self, source: URL, target: URL, response: Response):
+        if response.status_code not in PERMANENT_REDIRECT_STATUSES:
+            return
+        cache_control = CacheControl.parse(response.headers.get_header("cache-control"))
+        if cache_control.has("no-store"):
+            return
+        lifetime = freshness_lifetime(response.headers)
+        if lifetime == 0:
+            return
+        expires_at = time.time() + lifetime if lifetime else float("inf")
+        with self.lock:
+            self.redirects.pop(str(source), None)
+            self.redirects[str(source)] = (str(target), expires_at)
+            while len(self.redirects) > self.max_entries:
+                self.redirects.popitem(last=False)
+
+    def add_hsts(self, url: URL, header: Optional[str]):
+        """Record a Strict-Transport-Security header received over HTTPS."""
+        if not header or url.scheme != Scheme.HTTPS or _is_ip_address(url.host):
+            return
+        directives = {}
+        for directive in header.split(";"):
+            name, _, value = directive.partition("=")
+            directives[name.strip().lower()] = value.strip().strip('"')
+        max_age = directives.get("max-age", "")
+        if not max_age.isdigit():
+            return
+        with self.lock:
+            if int(max_age) == 0:
+                self.hsts_hosts.pop(url.host, None)
+            else:
+                self.hsts_hosts[url.host] = (
+                    time.time() + int(max_age),
+                    "includesubdomains" in directives,
+                )
+
+    def upgrade(self, url: URL) -> URL:
+        """Rewrite an http URL to https if its host is a known HSTS host."""
+        if url.scheme != Scheme.HTTP or not self._is_hsts_host(url.host):
+            return url
+        port = URL.DEFAULT_PORTS[Scheme.HTTPS] if url.port == 80 else url.port
+        return URL(f"https://{url.host}:{port}{url.path}")
+
+    def _get(self, source: str) -> Optional[str]:
+        with self.lock:
+            entry = self.redirects.get(source)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self.redirects[source]
+                return None
+            self.redirects.move_to_end(source)
+            return entry[0]
+
+    def _is_hsts_host(self, host: str) -> bool:
+        now = time.time()
+        with self.lock:
+            entry = self.hsts_hosts.get(host)
+            if entry and entry[0] > now:
+                return True
+            # A parent domain may cover its subdomains
+            labels = host.split(".")
+            for idx in range(1, len(labels) - 1):
+                entry = self.hsts_hosts.get(".".join(labels[idx:]))
+                if entry and entry[0] > now and entry[1]:
+                    return True
+        return False
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
@@ -14,6 +14,6 @@ class Request:
         self.method = method
 
     def __str__(self):
-        return "{} {} HTTP/1.0\r\n{}\r\n\r\n".format(
+        return "{} {} HTTP/1.1\r\n{}\r\n".format(
             self.method, self.url.path, self.headers
         )
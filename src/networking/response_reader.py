@@ -0,0 +1,233 @@
+import codecs
+import io
+import zlib
+from typing import Iterator, Optional, Tuple
+
+from src.networking.headers import SUPPORTED_CONTENT_ENCODINGS, Headers
+from src.networking.response import Response
+
+# Responses to these never carry a body, whatever their headers say
+BODILESS_STATUSES = {204, 304}
+
+READ_CHUNK_SIZE = 8192
+
+HEADER_ENCODING = "iso-8859-1"
+
+
+def parse_status_line(line: bytes) -> Tuple[str, int, str]:
+    """Split a status line into (version, status code, reason phrase)."""
+    statusline = line.decode(HEADER_ENCODING)
+    if not statusline:
+        raise ConnectionError("Connection closed before the status line")
+    version, status, explanation = statusline.split(" ", 2)
+    return version, int(status), explanation.strip()
+
+
+def add_header_line(headers: Headers, line: bytes) -> bool:
+    """Add one header line; returns False at the blank line ending the headers."""
+    text = line.decode(HEADER_ENCODING)
+    if text in ("\r\n", "\n", ""):
+        return False
+    header, value = text.split(":", 1)
+    headers.add_header(header.strip(), value.strip())
+    return True
+
+
+def parse_chunk_size(line: bytes) -> Optional[int]:
+    """
+    The size on a chunked body's size line, 0 for the last chunk, or None if
+    the connection closed before it arrived.
+    """
+    if not line:
+        return None
+    # Chunk extensions after ';' are ignored
+    return int(line.split(b";", 1)[0].strip(), 16)
+
+
+def is_trailer_end(line: bytes) -> bool:
+    """Whether `line` is the empty line after a chunked body's trailer headers."""
+    return line in (b"\r\n", b"\n")
+
+
+def set_charset(headers: Headers):
+    """Record the charset from Content-Type as the encoding of the body."""
+    charset = _charset(headers.get_header("content-type"))
+    if charset:
+        headers.set_encoding(charset)
+
+
+def is_keep_alive(version: str, headers: Headers) -> bool:
+    connection = (headers.get_header("connection") or "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+def has_body(response: Response) -> bool:
+    return not (response.status_code in BODILESS_STATUSES or response.status_code < 200)
+
+
+class ContentDecoder:
+    """
+    Removes a gzip or deflate Content-Encoding from body data as it arrives,
+    inflating never more than `chunk_size` bytes at a time so the whole
+    compressed body is never held in memory.
+    """
+
+    def __init__(self, encoding: str, chunk_size: int = READ_CHUNK_SIZE):
+        if encoding not in SUPPORTED_CONTENT_ENCODINGS:
+            raise ValueError(f"Unsupported content-encoding: {encoding}")
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        # 32 + MAX_WBITS accepts both gzip and zlib headers
+        self.decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        self.first_chunk = True
+
+    def decode(self, data: bytes) -> Iterator[bytes]:
+        try:
+            inflated = self.decompressor.decompress(data, self.chunk_size)
+        except zlib.error:
+            if not (self.first_chunk and self.encoding == "deflate"):
+                raise
+            # Some servers send raw deflate data without the zlib header
+            self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            inflated = self.decompressor.decompress(data, self.chunk_size)
+        self.first_chunk = False
+        # Inflate at most chunk_size bytes at a time
+        while True:
+            if inflated:
+                yield inflated
+            if not self.decompressor.unconsumed_tail:
+                break
+            inflated = self.decompressor.decompress(
+                self.decompressor.unconsumed_tail, self.chunk_size
+            )
+
+    def flush(self) -> bytes:
+        return self.decompressor.flush()
+
+
+def content_decoder(
+    response: Response, chunk_size: int = READ_CHUNK_SIZE
+) -> Optional[ContentDecoder]:
+    """A decoder for the response's Content-Encoding, or None if it has none."""
+    encoding = (response.headers.get_header("content-encoding") or "").lower()
+    if encoding in ("", "identity"):
+        return None
+    return ContentDecoder(encoding, chunk_size)
+
+
+class ResponseReader:
+    """
+    Reads one HTTP/1.x response at a time from a binary file, stopping
+    exactly where the message ends so the connection can be reused.
+
+    Bodies are yielded as bytes as soon as they arrive. They are bounded by
+    Content-Length, decoded from Transfer-Encoding: chunked, or, when neither
+    is present, run until the server closes the connection.
+    """
+
+    file: io.BufferedReader
+    version: str
+    # Set once a body has been read up to its framed end
+    complete: bool
+
+    def __init__(self, file: io.BufferedReader):
+        self.file = file
+        self.version = ""
+        self.complete = False
+
+    def read_response_head(self) -> Response:
+        self.version, status, explanation = parse_status_line(self.file.readline())
+        headers = self.read_headers()
+        return Response(status, explanation, headers, "")
+
+    def read_headers(self) -> Headers:
+        headers = Headers()
+        while add_header_line(headers, self.file.readline()):
+            pass
+        set_charset(headers)
+        return headers
+
+    def iter_body(
+        self, response: Response, chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        self.complete = False
+        if not has_body(response):
+            self.complete = True
+            return
+        transfer_encoding = response.headers.get_header("transfer-encoding")
+        content_length = response.headers.get_header("content-length")
+        if transfer_encoding and transfer_encoding.lower().endswith("chunked"):
+            yield from self._iter_chunked(chunk_size)
+        elif content_length is not None:
+            yield from self._iter_sized(int(content_length), chunk_size)
+        else:
+            while True:
+                data = self.file.read1(chunk_size)
+                if not data:
+                    return
+                yield data
+
+    def iter_content(
+        self, response: Response, chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Yield the body with its Content-Encoding removed, as it arrives."""
+        decoder = content_decoder(response, chunk_size)
+        if decoder is None:
+            yield from self.iter_body(response, chunk_size)
+            return
+        for data in self.iter_body(response, chunk_size):
+            yield from decoder.decode(data)
+        inflated = decoder.flush()
+        if inflated:
+            yield inflated
+
+    def _iter_sized(self, size: int, chunk_size: int) -> Iterator[bytes]:
+        remaining = size
+        while remaining > 0:
+            # read1 returns whatever has arrived instead of waiting for a
+            # full chunk, so callers see data as it streams in
+            data = self.file.read1(min(chunk_size, remaining))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+        self.complete = True
+
+    def _iter_chunked(self, chunk_size: int) -> Iterator[bytes]:
+        while True:
+            size = parse_chunk_size(self.file.readline())
+            if size is None:
+                return
+            if size == 0:
+                break
+            for data in self._iter_sized(size, chunk_size):
+                yield data
+            if not self.complete:
+                return
+            self.complete = False
+            # CRLF after the chunk data
+            self.file.readline()
+        # Skip trailer headers up to the final empty line
+        while True:
+            line = self.file.readline()
+            if is_trailer_end(line):
+                break
+            if not line:
+                return
+        self.complete = True
+
+
+def _charset(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            charset = value.strip().strip("\"'")
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                return None
+    return None
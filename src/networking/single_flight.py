@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Tuple
+
+
+class Abandoned(Exception):
+    """The leading call stopped before finishing, without failing."""
+
+
+class SingleFlight:
+    """
+    In-flight calls keyed by name. The first caller for a key leads and does
+    the work; callers that join while it runs wait on the same future and
+    share its result or error.
+    """
+
+    calls: Dict[str, Future]
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Return the future for `key`, and whether the caller leads it."""
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self.calls[key] = future
+            return future, True
+
+    def finish(self, key: str, future: Future, result: Any):
+        self._forget(key, future)
+        future.set_result(result)
+
+    def fail(self, key: str, future: Future, error: BaseException):
+        self._forget(key, future)
+        future.set_exception(error)
+
+    def _forget(self, key: str, future: Future):
+        # Later callers start a new flight instead of reusing this result
+        with self.lock:
+            if self.calls.get(key) is future:
+                del self.calls[key]
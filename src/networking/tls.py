@@ -0,0 +1,43 @@
+import ssl
+import threading
+from typing import Dict, Optional, Tuple
+
+_context: Optional[ssl.SSLContext] = None
+_context_lock = threading.Lock()
+
+
+def shared_ssl_context() -> ssl.SSLContext:
+    """
+    One default SSLContext for every connection. Loading the CA store is
+    expensive, and TLS sessions can only be resumed with the context that
+    created them.
+    """
+    global _context
+    with _context_lock:
+        if _context is None:
+            _context = ssl.create_default_context()
+        return _context
+
+
+class TLSSessionCache:
+    """The most recent TLS session per (host, port), for resuming handshakes."""
+
+    sessions: Dict[Tuple[str, int], ssl.SSLSession]
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, host: str, port: int) -> Optional[ssl.SSLSession]:
+        with self.lock:
+            return self.sessions.get((host, port))
+
+    def set(self, host: str, port: int, session: Optional[ssl.SSLSession]):
+        if session is None:
+            return
+        with self.lock:
+            self.sessions[(host, port)] = session
+
+    def remove(self, host: str, port: int):
+        with self.lock:
+            self.sessions.pop((host, port), None)
@@ -13,4 +13,4 @@ class DataParser(Parser):
         self.resolver = resolver
 
     def lex(self) -> HTMLElement:
-        return HTMLElement(Text(self.resolver.resolve(), None, []))
+        return HTMLElement(Text(self.resolver.resolve(), None))
@@ -0,0 +1,9 @@
+import html
+
+
+def decode_entities(text: str) -> str:
+    # html.unescape covers the full HTML5 named-entity table plus decimal and
+    # hex references in a single re.sub pass.
+    if "&" not in text:
+        return text
+    return html.unescape(text)
@@ -17,4 +17,4 @@ class FileParser(Parser):
         if Path(self.resolver.url.path).suffix == ".html":
             # If we have a .html document, we just use the HTML parser to lex it.
             return HTMLParser(self.resolver).lex()
-        return HTMLElement(Text(self.resolver.resolve(), None, []))
+        return HTMLElement(Text(self.resolver.resolve(), None))
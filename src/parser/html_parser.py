@@ -1,39 +1,64 @@
+import re
+import sys
 from enum import Enum
-from typing import List, Tuple, Union
+from typing import Dict, List, Optional, Pattern, Tuple, Union
 
+from src.parser.entities import decode_entities
 from src.parser.parser import Parser
 from src.render.attributes import Attributes
+from src.render.base_element import BaseElement
 from src.render.element import Element
 from src.render.html_element import HTMLElement
-from src.render.text import Text
+from src.render.text import RawSourceText, SourceText, Text
 from src.resolver.file_resolver import FileResolver
 from src.resolver.http_resolver import HTTPResolver
 
+COMMENT_START = "<!--"
+COMMENT_END = "-->"
 
-class HTMLEntity(Enum):
-    GreaterThan = ("&gt;", ">")
-    LessThan = ("&lt;", "<")
-    Amperstand = ("&amp;", "&")
-    Dash = ("&dash;", "-")
-    NDash = ("&ndash;", "–")
-    MDash = ("&mdash;", "—")
-    Copy = ("&copy;", "©")
+HTML_CHILD_TAGS = {"head", "body", "/html"}
 
-    def contains(self, value: str) -> bool:
-        return value in self.value
+NON_WHITESPACE = re.compile(r"\S")
 
-    def __str__(self):
-        return self.value[0]
+# What ends each kind of token that can be split across chunks
+TEXT_END = re.compile("<")
+COMMENT_END_PATTERN = re.compile(re.escape(COMMENT_END))
+TAG_END = re.compile(">")
 
-    def symbol(self):
-        return self.value[1]
+TAG_NAME = re.compile(r"/?[^\s/]+")
+ATTRIBUTE = re.compile(r"""([^\s"'/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|(\S+)))?""")
+# Attributes whose values repeat often enough across a page to intern
+INTERNED_ATTRIBUTE_VALUES = {"class", "rel", "type", "lang", "dir", "name", "target"}
+
+# Elements whose contents are text up to the matching end tag. Script and
+# style bodies are raw text; title and textarea still decode entities.
+RAW_TEXT_TAGS = {"script", "style"}
+ESCAPABLE_RAW_TEXT_TAGS = {"title", "textarea"}
+RAW_TEXT_END_TAGS = {
+    tag: re.compile(rf"</{tag}[\s/>]", re.IGNORECASE)
+    for tag in RAW_TEXT_TAGS | ESCAPABLE_RAW_TEXT_TAGS
+}
+# How much held-back input to search again for a terminator split across
+# chunks: the longest is "</textarea" with the character after it
+PENDING_LOOKBEHIND = 10
+
+
+class InsertionMode(Enum):
+    Initial = "initial"
+    BeforeHead = "before head"
+    InHead = "in head"
+    InBody = "in body"
 
 
 class HTMLParser(Parser):
     resolver: Union[HTTPResolver, FileResolver]
-    unfinished_tags: List[HTMLElement]
-    inside_tag: bool
-    inside_comment: bool
+    unfinished_tags: List[Element]
+    open_tags: List[str]
+    pending: List[str]
+    pending_tail: str
+    waiting_for: Optional[Pattern[str]]
+    lazy_text: bool
+    raw_text_tag: Optional[str]
 
     HEAD_TAGS = [
         "base",
@@ -47,61 +72,162 @@ class HTMLParser(Parser):
         "script",
     ]
 
-    def __init__(self, resolver: Union[HTTPResolver, FileResolver]):
+    def __init__(
+        self, resolver: Union[HTTPResolver, FileResolver], lazy_text: bool = False
+    ):
         self.resolver = resolver
+        # When set, text nodes keep offsets into the source instead of copies
+        self.lazy_text = lazy_text
         self.unfinished_tags = []
-        self.inside_tag = False
-        self.inside_comment = False
+        # Tag names of unfinished_tags, kept in sync so the implicit-tag
+        # decision never has to walk the whole stack.
+        self.open_tags = []
+        # Input held back until the token it starts is complete, kept as
+        # chunks so each feed doesn't copy everything held back so far
+        self.pending = []
+        self.pending_tail = ""
+        # What completes the pending token; None to retry on any input
+        self.waiting_for = None
+        # Set while inside a raw-text element, possibly across chunks
+        self.raw_text_tag = None
 
     def lex(self) -> HTMLElement:
-        document = self.resolver.resolve()
-        transformed = self._transform(document)
-        return self._parse(transformed)
-
-    def _parse(self, document: str) -> HTMLElement:
-        text_buffer = ""
-        for idx, char in enumerate(document):
-            self.handle_comment(document, idx)
-            if self.inside_comment:
-                continue
+        for chunk in self.resolver.stream():
+            self.feed(chunk)
+        return self.close()
 
-            if char == "<":
-                self.inside_tag = True
-                text_buffer = text_buffer.strip()
-                if text_buffer:
-                    self.add_text(text_buffer)
-                text_buffer = ""
-            elif char == ">":
-                self.inside_tag = False
-                text_buffer = text_buffer.strip()
-                if text_buffer:
-                    self.add_tag(text_buffer)
-                text_buffer = ""
-            else:
-                text_buffer += char
-        if not self.inside_tag and text_buffer:
-            text_buffer = text_buffer.strip()
-            if text_buffer:
-                self.add_tag(text_buffer)
+    def feed(self, chunk: str):
+        """
+        Parse as much of `chunk` as possible. Input that might continue in the
+        next chunk (text, an open tag or an open comment) is kept until more
+        data arrives or close() is called.
+        """
+        if self.waiting_for is not None:
+            # Only the new input, plus a few characters before it, can hold
+            # the end of the pending token
+            window = self.pending_tail + chunk
+            if self.waiting_for.search(window) is None:
+                self.pending.append(chunk)
+                self.pending_tail = window[-PENDING_LOOKBEHIND:]
+                return
+        self.pending.append(chunk)
+        document = "".join(self.pending)
+        consumed = self._tokenize(document, final=False)
+        rest = document[consumed:]
+        self.pending = [rest] if rest else []
+        self.pending_tail = rest[-PENDING_LOOKBEHIND:]
+
+    def close(self) -> HTMLElement:
+        self._tokenize("".join(self.pending), final=True)
+        self.pending = []
+        self.pending_tail = ""
+        self.waiting_for = None
         return self.finish()
 
-    def handle_comment(self, document: str, idx: int):
-        if self.is_comment_beginning(document, idx):
-            self.inside_comment = True
-        elif self.is_comment_end(document, idx):
-            self.inside_comment = False
+    def _tokenize(self, document: str, final: bool) -> int:
+        """
+        Emit every complete token in `document` and return the index of the
+        first character that was not consumed.
+        """
+        # Jump between tag boundaries with str.find instead of walking the
+        # document one character at a time; text and tag contents are slices.
+        idx = 0
+        end = len(document)
+        self.waiting_for = None
+        while idx < end:
+            if self.raw_text_tag is not None:
+                idx = self._tokenize_raw_text(document, idx, final)
+                if self.raw_text_tag is not None:
+                    return idx
+                continue
+
+            tag_start = document.find("<", idx)
+            if tag_start == -1:
+                if not final:
+                    # The text run may continue in the next chunk
+                    self.waiting_for = TEXT_END
+                    return idx
+                self.handle_text(document, idx, end)
+                return end
+            if tag_start > idx:
+                self.handle_text(document, idx, tag_start)
+
+            if (
+                not final
+                and end - tag_start < len(COMMENT_START)
+                and COMMENT_START.startswith(document[tag_start:])
+            ):
+                # Can't tell a comment from a tag until more input arrives
+                return tag_start
 
-    def is_comment_beginning(self, document: str, idx: int) -> bool:
-        return self._peek_with_offset(document, idx, len("!--")) == "!--"
+            if document.startswith(COMMENT_START, tag_start):
+                comment_end = document.find(COMMENT_END, tag_start + 2)
+                if comment_end == -1:
+                    # Unterminated comments swallow the rest of the document
+                    self.waiting_for = COMMENT_END_PATTERN
+                    return end if final else tag_start
+                idx = comment_end + len(COMMENT_END)
+                continue
 
-    def is_comment_end(self, document: str, idx: int) -> bool:
-        return self._peek_with_offset(document, idx, len("-->")) == "-->"
+            tag_end = document.find(">", tag_start + 1)
+            if tag_end == -1:
+                # Drop an unterminated trailing tag
+                self.waiting_for = TAG_END
+                return end if final else tag_start
+            tag = document[tag_start + 1 : tag_end].strip()
+            if tag:
+                self.add_tag(tag)
+                if self.open_tags and self.open_tags[-1] in RAW_TEXT_END_TAGS:
+                    self.raw_text_tag = self.open_tags[-1]
+            idx = tag_end + 1
+        return end
+
+    def _tokenize_raw_text(self, document: str, idx: int, final: bool) -> int:
+        """
+        Jump from the start of a raw-text element's contents straight to its
+        end tag and emit everything in between as a single text node. Returns
+        the index of the end tag, or where to resume if it hasn't arrived yet.
+        """
+        tag = self.raw_text_tag
+        assert tag is not None
+        end_tag = RAW_TEXT_END_TAGS[tag].search(document, idx)
+        if end_tag is None:
+            if not final:
+                # Hold the body back until a chunk brings its end tag, then
+                # join it once
+                self.waiting_for = RAW_TEXT_END_TAGS[tag]
+                return idx
+            text_end = len(document)
+        else:
+            text_end = end_tag.start()
+        self.raw_text_tag = None
+        self.handle_text(document, idx, text_end, tag not in RAW_TEXT_TAGS)
+        return text_end
+
+    def handle_text(self, document: str, start: int, end: int, decode: bool = True):
+        if self.lazy_text:
+            # Skip whitespace-only runs without slicing the document
+            if NON_WHITESPACE.search(document, start, end):
+                self.add_source_text(document, start, end, decode)
+            return
+        text = document[start:end].strip()
+        if text:
+            self.add_text(decode_entities(text) if decode else text)
 
     def add_text(self, text: str):
         self.implicit_tags(None)
         parent = self.unfinished_tags[-1]
-        node = Text(text, parent.element, [])
-        parent.element.children.append(node)
+        node = Text(text, parent)
+        parent.children.append(node)
+
+    def add_source_text(self, source: str, start: int, end: int, decode: bool):
+        self.implicit_tags(None)
+        parent = self.unfinished_tags[-1]
+        if decode:
+            node = SourceText(source, start, end, parent)
+        else:
+            node = RawSourceText(source, start, end, parent)
+        parent.children.append(node)
 
     def add_tag(self, tag: str):
         tag, attributes = self.get_attributes(tag)
@@ -114,23 +240,33 @@ class HTMLParser(Parser):
         elif HTMLElement.is_self_closing(tag):
             self.self_closing_tag(tag, attributes)
         else:
-            self.add_tag_to_parent(tag)
+            self.add_tag_to_parent(tag, attributes)
+
+    def insertion_mode(self) -> InsertionMode:
+        depth = len(self.open_tags)
+        if depth == 0:
+            return InsertionMode.Initial
+        # The root of the stack is always <html>
+        if depth == 1:
+            return InsertionMode.BeforeHead
+        if depth == 2 and self.open_tags[1] == "head":
+            return InsertionMode.InHead
+        return InsertionMode.InBody
 
     def implicit_tags(self, tag: Union[str, None]):
         while True:
-            open_tags: List[str] = []
-            for t in self.unfinished_tags:
-                if isinstance(t.element, Element):
-                    open_tags.append(t.element.tag)
-            if open_tags == [] and tag != "html":
+            mode = self.insertion_mode()
+            if mode is InsertionMode.Initial and tag != "html":
                 self.add_tag("html")
-            elif open_tags == ["html"] and tag not in ["head", "body", "/html"]:
+            elif mode is InsertionMode.BeforeHead and tag not in HTML_CHILD_TAGS:
                 if tag in self.HEAD_TAGS:
                     self.add_tag("head")
                 else:
                     self.add_tag("body")
             elif (
-                open_tags == ["html", "head"] and tag not in ["/head"] + self.HEAD_TAGS
+                mode is InsertionMode.InHead
+                and tag != "/head"
+                and tag not in self.HEAD_TAGS
             ):
                 self.add_tag("/head")
             else:
@@ -141,17 +277,16 @@ class HTMLParser(Parser):
             return
         # Get the last unfinished tag
         node = self.unfinished_tags.pop()
+        self.open_tags.pop()
         # Get the parent if it exists
         parent = self.unfinished_tags[-1] if self.unfinished_tags else None
         if parent:
             # Add it to the parent
-            parent.element.children.append(node.element)
+            parent.children.append(node)
 
     def self_closing_tag(self, tag: str, attributes: Attributes = Attributes({})):
         # Get the last unfinished tag
-        self_closing_parent = (
-            self.unfinished_tags[-1].element if self.unfinished_tags else None
-        )
+        self_closing_parent = self.unfinished_tags[-1] if self.unfinished_tags else None
         if self_closing_parent:
             # Create a new element
             self_closing_element = Element(tag, self_closing_parent, [], attributes)
@@ -160,58 +295,79 @@ class HTMLParser(Parser):
 
     def add_tag_to_parent(self, tag: str, attributes: Attributes = Attributes({})):
         # Get the last unfinished tag
-        parent_element = (
-            self.unfinished_tags[-1].element if self.unfinished_tags else None
-        )
+        parent_element = self.unfinished_tags[-1] if self.unfinished_tags else None
         # Create a new element with the parent
         element_tag = Element(tag, parent_element, [], attributes)
         # Add to the unfinished tags
-        self.unfinished_tags.append(HTMLElement(element_tag))
+        self.unfinished_tags.append(element_tag)
+        self.open_tags.append(tag)
 
     def get_attributes(self, text: str) -> Tuple[str, Attributes]:
-        parts = text.split()
-        tag = parts[0].lower()
-        attributes = Attributes.from_tag(parts[1:])
-        return tag, attributes
+        tag_name = TAG_NAME.match(text)
+        if tag_name is None:
+            return text.lower(), Attributes({})
+        tag = tag_name.group().lower()
+        return tag, Attributes(parse_attributes(text, tag_name.end()))
+
+    def snapshot(self) -> Optional[HTMLElement]:
+        """
+        The tree parsed so far with every open element closed, or None before
+        the first tag. Open elements are copied and finished subtrees shared,
+        so parsing can carry on while another thread reads the snapshot.
+        """
+        root: Optional[Element] = None
+        for element in reversed(self.unfinished_tags):
+            copy = Element(
+                element.tag, None, list(element.children), element.attributes
+            )
+            if root is not None:
+                root.parent = copy
+                copy.children.append(root)
+            root = copy
+        return HTMLElement(root) if root is not None else None
 
     def finish(self) -> HTMLElement:
         if len(self.unfinished_tags) == 0:
             self.add_tag("html")
         while len(self.unfinished_tags) > 1:
             node = self.unfinished_tags.pop()
+            self.open_tags.pop()
             parent = self.unfinished_tags[-1]
-            parent.element.children.append(node.element)
-        return self.unfinished_tags.pop()
+            parent.children.append(node)
+        self.open_tags.pop()
+        return HTMLElement(self.unfinished_tags.pop())
 
-    def _transform(self, document: str) -> str:
-        transformed_document = ""
-        idx = 0
-        while idx < len(document):
-            if document[idx] == "&":
-                for entity in HTMLEntity:
-                    if entity.contains(document[idx : idx + len(str(entity))]):
-                        transformed_document += entity.symbol()
-                        idx += len(str(entity))
-                        break
-            transformed_document += document[idx]
-            idx += 1
-        return transformed_document
-
-    def _is_start_of_tag(self, document: str, idx: int, tag: str) -> bool:
-        return self._peek(document, idx) == f"<{tag}"
-
-    def _peek(self, document: str, idx: int) -> str:
-        if idx + 1 > len(document):
-            return ""
-        return document[idx : idx + 1]
-
-    def _peek_with_offset(self, document: str, idx: int, offset: int) -> str:
-        if idx + offset > len(document):
-            return ""
-        return document[idx : idx + offset]
+
+def parse_attributes(text: str, start: int) -> Dict[str, str]:
+    """Parse the attributes in the source of a start tag from `start` on."""
+    # One pass over the tag source; names and common values are interned so
+    # large documents share a single copy of each.
+    attributes: Dict[str, str] = {}
+    for match in ATTRIBUTE.finditer(text, start):
+        key, double_quoted, single_quoted, unquoted = match.groups()
+        key = sys.intern(key.lower())
+        if key in attributes:
+            # The first occurrence of a duplicated attribute wins
+            continue
+        if double_quoted is not None:
+            value = double_quoted
+        elif single_quoted is not None:
+            value = single_quoted
+        else:
+            value = unquoted or ""
+        value = decode_entities(value)
+        if key in INTERNED_ATTRIBUTE_VALUES:
+            value = sys.intern(value)
+        attributes[key] = value
+    return attributes
 
 
 def print_tree(node: HTMLElement, indent: int = 0):
-    print(" " * indent, node.element)
-    for child in node.element.children:
-        print_tree(HTMLElement(child), indent + 1)
+    # Walk the nodes directly with an explicit stack so deep documents neither
+    # recurse nor allocate a wrapper per node.
+    stack: List[Tuple[BaseElement, int]] = [(node.element, indent)]
+    while stack:
+        element, depth = stack.pop()
+        print(" " * depth, element)
+        for child in reversed(element.children):
+            stack.append((child, depth + 1))
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from src.parser.data_parser import DataParser
 from src.parser.file_parser import FileParser
 from src.parser.html_parser import HTMLParser
@@ -14,6 +16,9 @@ class ParserFactory:
         if isinstance(resolver, HTTPResolver):
             return HTMLParser(resolver)
         elif isinstance(resolver, FileResolver):
+            if Path(resolver.url.path).suffix == ".html":
+                # Streamed like a network page, so it is painted progressively
+                return HTMLParser(resolver)
             return FileParser(resolver)
         elif isinstance(resolver, DataResolver):
             return DataParser(resolver)
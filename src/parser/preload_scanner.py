@@ -0,0 +1,223 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Iterable, Iterator, List, Optional, Pattern, Set, Tuple
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import DiskCache
+from src.networking.http_client import DNS_CACHE, HTTPClient
+from src.parser.html_parser import (
+    COMMENT_END,
+    COMMENT_END_PATTERN,
+    COMMENT_START,
+    PENDING_LOOKBEHIND,
+    RAW_TEXT_END_TAGS,
+    TAG_END,
+    TAG_NAME,
+    parse_attributes,
+)
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+
+# Start tags that can name a subresource or a hint
+PRELOAD_TAGS = {"base", "img", "link", "script"}
+
+# Link relations whose target is fetched ahead of use
+FETCHED_LINK_RELS = {"preload", "modulepreload", "stylesheet"}
+
+PRELOAD_WORKERS = 4
+
+
+class PreloadKind(Enum):
+    DNSPrefetch = "dns-prefetch"
+    Preconnect = "preconnect"
+    Fetch = "fetch"
+
+
+Preload = Tuple[PreloadKind, URL]
+
+
+class PreloadScanner:
+    """
+    Finds subresource URLs and resource hints in HTML as it streams in,
+    without building a tree, so their fetches can start while the real
+    parser is still working through the document. Only start tags of
+    interest are tokenized; comments and the bodies of raw-text elements like
+    <script> and <textarea> are skipped.
+
+    Like HTMLParser, input that can't be scanned yet is held back as a list
+    of chunks and only joined again once a chunk brings what it waits for.
+    """
+
+    base: URL
+    pending: List[str]
+    pending_tail: str
+    waiting_for: Optional[Pattern[str]]
+    # The raw-text element whose body is being skipped, if any
+    raw_text_tag: Optional[str]
+    seen: Set[Tuple[PreloadKind, str]]
+
+    def __init__(self, base: URL):
+        self.base = base
+        self.pending = []
+        self.pending_tail = ""
+        self.waiting_for = None
+        self.raw_text_tag = None
+        self.seen = set()
+
+    def feed(self, chunk: str) -> List[Preload]:
+        """Scan `chunk` and return the preloads found in it, each URL once."""
+        preloads: List[Preload] = []
+        if self.waiting_for is not None:
+            # Only the new input, plus a few characters before it, can hold
+            # the end of the held-back token
+            window = self.pending_tail + chunk
+            if self.waiting_for.search(window) is None:
+                self.pending.append(chunk)
+                self.pending_tail = window[-PENDING_LOOKBEHIND:]
+                return preloads
+        self.pending.append(chunk)
+        buffer = "".join(self.pending)
+        self.waiting_for = None
+        idx = 0
+        while True:
+            if self.raw_text_tag is not None:
+                end_tag = RAW_TEXT_END_TAGS[self.raw_text_tag].search(buffer, idx)
+                if end_tag is None:
+                    # The skipped body isn't needed; keep only enough to
+                    # find an end tag split across chunks
+                    idx = max(idx, len(buffer) - PENDING_LOOKBEHIND)
+                    self.waiting_for = RAW_TEXT_END_TAGS[self.raw_text_tag]
+                    break
+                self.raw_text_tag = None
+                idx = end_tag.end()
+                continue
+            tag_start = buffer.find("<", idx)
+            if tag_start == -1:
+                idx = len(buffer)
+                break
+            if buffer.startswith(COMMENT_START, tag_start):
+                comment_end = buffer.find(COMMENT_END, tag_start + 2)
+                if comment_end == -1:
+                    idx = tag_start
+                    self.waiting_for = COMMENT_END_PATTERN
+                    break
+                idx = comment_end + len(COMMENT_END)
+                continue
+            tag_end = buffer.find(">", tag_start + 1)
+            if tag_end == -1:
+                idx = tag_start
+                self.waiting_for = TAG_END
+                break
+            self._scan_tag(buffer[tag_start + 1 : tag_end], preloads)
+            idx = tag_end + 1
+        rest = buffer[idx:]
+        self.pending = [rest] if rest else []
+        self.pending_tail = rest[-PENDING_LOOKBEHIND:]
+        return preloads
+
+    def _scan_tag(self, tag: str, preloads: List[Preload]):
+        tag_name = TAG_NAME.match(tag)
+        if tag_name is None:
+            return
+        name = tag_name.group().lower()
+        if name in RAW_TEXT_END_TAGS and not tag.rstrip().endswith("/"):
+            self.raw_text_tag = name
+        if name not in PRELOAD_TAGS:
+            return
+        attributes = parse_attributes(tag, tag_name.end())
+        if name == "script":
+            self._add(PreloadKind.Fetch, attributes.get("src"), preloads)
+        elif name == "img":
+            self._add(PreloadKind.Fetch, attributes.get("src"), preloads)
+        elif name == "base":
+            url = self._resolve(attributes.get("href"))
+            if url is not None:
+                self.base = url
+        else:
+            rels = set(attributes.get("rel", "").lower().split())
+            href = attributes.get("href")
+            if "dns-prefetch" in rels:
+                self._add(PreloadKind.DNSPrefetch, href, preloads)
+            if "preconnect" in rels:
+                self._add(PreloadKind.Preconnect, href, preloads)
+            if rels & FETCHED_LINK_RELS:
+                self._add(PreloadKind.Fetch, href, preloads)
+
+    def _add(self, kind: PreloadKind, href: Optional[str], preloads: List[Preload]):
+        url = self._resolve(href)
+        if url is None or (kind, str(url)) in self.seen:
+            return
+        self.seen.add((kind, str(url)))
+        preloads.append((kind, url))
+
+    def _resolve(self, href: Optional[str]) -> Optional[URL]:
+        if not href:
+            return None
+        try:
+            # data:, javascript: and the like have nothing to fetch
+            return self.base.resolve(href)
+        except ValueError:
+            return None
+
+
+class Preloader:
+    """
+    Carries out preloads on a few background threads: DNS lookups go into
+    the DNS cache, preconnects leave an idle connection in the pool, and
+    fetches go through HTTPResolver into the memory and disk caches. A load
+    of the same URL that starts while a fetch is in flight joins it.
+    """
+
+    cache: BrowserCache
+    connection_pool: ConnectionPool
+    disk_cache: Optional[DiskCache]
+    closed: bool
+
+    def __init__(
+        self,
+        cache: BrowserCache,
+        connection_pool: ConnectionPool,
+        disk_cache: Optional[DiskCache] = None,
+        max_workers: int = PRELOAD_WORKERS,
+    ):
+        self.cache = cache
+        self.connection_pool = connection_pool
+        self.disk_cache = disk_cache
+        self.closed = False
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="preload")
+
+    def scan(self, chunks: Iterable[str], url: URL) -> Iterator[str]:
+        """Pass `chunks` through, starting preloads for each before it's parsed."""
+        scanner = PreloadScanner(url)
+        for chunk in chunks:
+            for preload in scanner.feed(chunk):
+                if not self.closed:
+                    self.start(preload)
+            yield chunk
+
+    def start(self, preload: Preload) -> Future:
+        return self.executor.submit(self._run, preload)
+
+    def close(self):
+        # Preloads still queued see the flag and return
+        self.closed = True
+        self.executor.shutdown(wait=False)
+
+    def _run(self, preload: Preload):
+        if self.closed:
+            return
+        kind, url = preload
+        try:
+            if kind is PreloadKind.DNSPrefetch:
+                DNS_CACHE.resolve(url.host, url.port)
+            elif kind is PreloadKind.Preconnect:
+                HTTPClient(url, pool=self.connection_pool).preconnect()
+            else:
+                HTTPResolver(
+                    url, self.cache, self.connection_pool, self.disk_cache
+                ).resolve()
+        except Exception:
+            # Preloads are speculative; the load that needs the resource
+            # reports its errors
+            pass
@@ -1,25 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict
 
 
 @dataclass
 class Attributes:
-    attributes: Dict[str, str]
+    __slots__ = ("attributes",)
 
-    @staticmethod
-    def from_tag(tag_parts: List[str]) -> Attributes:
-        attributes = Attributes({})
-        for attr_pair in tag_parts:
-            if "=" in attr_pair:
-                key, value = attr_pair.split("=", 1)
-                if len(value) > 2 and value[0] in ["'", '"']:
-                    value = value[1:-1]
-                attributes.set_attribute(key, value)
-            else:
-                attributes.set_attribute(attr_pair, "")
-        return attributes
+    attributes: Dict[str, str]
 
     def get_attribute(self, key: str) -> str:
         return self.attributes.get(key, "")
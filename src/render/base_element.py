@@ -1,13 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Optional, Sequence, Tuple
+
+# Shared by every leaf node so that nodes without children don't each carry
+# their own empty list.
+EMPTY_CHILDREN: Tuple[BaseElement, ...] = ()
 
 
-@dataclass
 class BaseElement:
-    parent: Optional[BaseElement] = None
-    children: List[BaseElement] = field(default_factory=list)
+    # DOM trees hold hundreds of thousands of nodes, so nodes use __slots__
+    # instead of a per-instance __dict__.
+    __slots__ = ("parent", "children")
+
+    parent: Optional[BaseElement]
+    children: Sequence[BaseElement]
+
+    def __init__(
+        self,
+        parent: Optional[BaseElement] = None,
+        children: Sequence[BaseElement] = EMPTY_CHILDREN,
+    ):
+        self.parent = parent
+        self.children = children
 
     def __str__(self):
         return f"BaseElement({self.__class__.__name__})"
@@ -1,15 +1,41 @@
+import functools
+import time
 import tkinter
 import tkinter.font
 from enum import Enum
+from typing import Callable, Optional
 
 from src.networking.cache import BrowserCache
-from src.parser.html_parser import print_tree
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import DiskCache, default_cache_directory
+from src.parser.html_parser import HTMLParser
 from src.parser.parser_factory import ParserFactory
+from src.parser.preload_scanner import Preloader
 from src.render.document_layout import DocumentLayout
 from src.render.layout import BlockLayout, DisplayList
+from src.render.page_cache import PageCache, PageKey, ParsedPage
+from src.render.page_loader import PageLoad, PageLoader
 from src.render.settings import Settings
 from src.resolver.resolver_factory import ResolverFactory
-from src.utils.url import AbstractURL
+from src.utils.url import URL, AbstractURL
+
+
+# How often the Tk thread checks whether a background load has finished
+LOAD_POLL_INTERVAL_MS = 16
+# How often the worker snapshots a page that is still parsing, so the Tk
+# thread can paint what has arrived so far
+PARTIAL_PAINT_INTERVAL = 0.05
+
+# How far past the bottom of the viewport layout runs before stopping
+LAYOUT_MARGIN = 200
+# Screens below the viewport to lay out ahead of time while idle
+LAYOUT_AHEAD_SCREENS = 2
+# Layout time per idle callback, about half a frame at 60 Hz, checked every
+# LAYOUT_SLICE_NODES nodes
+LAYOUT_SLICE_SECONDS = 0.008
+LAYOUT_SLICE_NODES = 200
+
+FirstPaintHook = Callable[[AbstractURL, float], None]
 
 
 class WindowBindings(Enum):
@@ -33,7 +59,24 @@ class Browser:
     window: tkinter.Tk
     canvas: tkinter.Canvas
     cache: BrowserCache
-    document: DocumentLayout
+    connection_pool: ConnectionPool
+    disk_cache: DiskCache
+    page_cache: PageCache
+    preloader: Preloader
+    loader: PageLoader
+    # Whether the page being shown is laid out to the end; until then it is
+    # laid out lazily as the viewport moves
+    layout_finished: bool
+    layout_ahead_scheduled: bool
+    # Where the page being shown is cached, to update its size once laid out
+    page_key: Optional[PageKey]
+    # The load whose partly parsed page is on screen, if any
+    partial_load: Optional[PageLoad]
+    # The load whose first paint has been reported
+    painted_load: Optional[PageLoad]
+    # Called with the URL and seconds from navigation to first paint
+    on_first_paint: Optional[FirstPaintHook]
+    document: Optional[DocumentLayout]
     display_list: DisplayList
 
     scroll: int
@@ -51,6 +94,19 @@ class Browser:
         self.scroll = 0
         self.canvas.pack(fill=tkinter.BOTH, expand=tkinter.YES)
         self.cache = BrowserCache()
+        self.connection_pool = ConnectionPool()
+        self.disk_cache = DiskCache(default_cache_directory())
+        self.page_cache = PageCache()
+        self.preloader = Preloader(self.cache, self.connection_pool, self.disk_cache)
+        self.loader = PageLoader(self._fetch_and_parse)
+        self.document = None
+        self.display_list = []
+        self.layout_finished = True
+        self.layout_ahead_scheduled = False
+        self.page_key = None
+        self.partial_load = None
+        self.painted_load = None
+        self.on_first_paint = None
         self._init_window_bindings()
 
     def _init_window_bindings(self):
@@ -66,15 +122,168 @@ class Browser:
         # self.window.bind(str(WindowBindings.RESIZE), self._resize)
 
     def load(self, url: AbstractURL):
-        resolver = ResolverFactory.create(url, self.cache)
+        """
+        Start loading `url` in the background, cancelling any load still in
+        progress. What has been parsed is painted while the rest streams in.
+        """
+        was_loading = self.loader.is_loading()
+        self.loader.start(url)
+        if not was_loading:
+            self.window.after(LOAD_POLL_INTERVAL_MS, self._poll_load)
+
+    def _fetch_and_parse(self, load: PageLoad) -> ParsedPage:
+        """Runs on the loader's worker thread; must not touch Tk."""
+        resolver = ResolverFactory.create(
+            load.url, self.cache, self.connection_pool, self.disk_cache
+        )
         parser = ParserFactory.create(resolver)
-        nodes = parser.lex()
-        print_tree(nodes)
+        if isinstance(parser, HTMLParser):
+            chunks = resolver.stream()
+            if isinstance(load.url, URL):
+                # Start subresource fetches as their tags stream past
+                chunks = self.preloader.scan(chunks, load.url)
+            # Reuse the parsed tree and layout of content seen before
+            parsed = self.page_cache.parse(
+                load.guard(chunks),
+                parser,
+                self.settings.layout_key(),
+                functools.partial(self._snapshot_partial, load),
+            )
+        else:
+            parsed = {"key": None, "page": None, "nodes": parser.lex(), "tree_size": 0}
+        load.check()
+        return parsed
+
+    def _snapshot_partial(self, load: PageLoad, parser: HTMLParser):
+        """Runs on the worker after each parsed chunk."""
+        now = time.monotonic()
+        if not load.wants_partial or now - load.partial_at < PARTIAL_PAINT_INTERVAL:
+            return
+        load.partial_at = now
+        nodes = parser.snapshot()
+        if nodes is not None:
+            load.set_partial(nodes)
 
+    def _poll_load(self):
+        load = self.loader.poll()
+        if load is None:
+            current = self.loader.current
+            if current is not None:
+                self._show_partial(current)
+                self.window.after(LOAD_POLL_INTERVAL_MS, self._poll_load)
+            return
+        if load.error is not None:
+            raise load.error
+        self._show(load)
+
+    def _show(self, load: PageLoad):
+        parsed = load.parsed
+        assert parsed is not None
+        # A page painted while it was parsing keeps its scroll position
+        painted = self.partial_load is load
+        self.partial_load = None
+        if not painted:
+            self.scroll = 0
+        key = None
+        page = None
+        if parsed["key"] is not None:
+            # The font size may have changed while the page was loading
+            key = (parsed["key"][0], self.settings.layout_key())
+            page = parsed["page"] if key == parsed["key"] else None
+            if page is None:
+                # Streamed bodies are only hashed once parsed; reuse the
+                # layout cached for the same content all the same
+                page = self.page_cache.get(key)
+        if page is not None:
+            # Layout carries on from wherever it stopped last time
+            document = page["document"]
+        else:
+            document = DocumentLayout(parsed["nodes"], self.settings)
+            if key is not None:
+                self.page_cache.set(key, document, parsed["tree_size"])
+        self.document = document
+        self.page_key = key
+        self.layout_finished = document.finished()
+        self.display_list = document.display_list
+        # Lay out only the visible screenful; the rest follows on demand
+        self._extend_layout(self.scroll + self.settings.window_height + LAYOUT_MARGIN)
+        self.draw()
+        self._first_paint(load)
+        self._schedule_layout_ahead()
+
+    def _show_partial(self, load: PageLoad):
+        """
+        Paint the newest snapshot of a page that is still parsing, until one
+        fills the viewport. The finished page replaces it in _show.
+        """
+        nodes = load.take_partial()
+        if nodes is None:
+            return
+        first = self.partial_load is not load
+        self.partial_load = load
+        if first:
+            self.scroll = 0
         self.document = DocumentLayout(nodes, self.settings)
-        self.document.layout()
-        self.display_list = self.document.display_list
+        self.page_key = None
+        self.layout_finished = False
+        # Asked for again if this snapshot runs out before the viewport does
+        load.wants_partial = False
+        self._extend_layout(self.scroll + self.settings.window_height + LAYOUT_MARGIN)
         self.draw()
+        self._first_paint(load)
+
+    def _extend_layout(self, y: int, max_nodes: Optional[int] = None):
+        """Continue the lazy layout of the current page until it reaches `y`."""
+        document = self.document
+        if self.layout_finished or document is None:
+            return
+        finished = document.layout_until(y, max_nodes)
+        self.display_list = document.display_list
+        if not finished:
+            return
+        self.layout_finished = True
+        if self.partial_load is not None:
+            # Only part of the page; paint a newer snapshot if there is one,
+            # and the finished page once parsing is done
+            self.partial_load.wants_partial = True
+            return
+        if self.page_key is not None:
+            self.page_cache.update_size(self.page_key)
+
+    def _schedule_layout_ahead(self):
+        if (
+            self.layout_finished
+            or self.layout_ahead_scheduled
+            or self.partial_load is not None
+        ):
+            return
+        self.layout_ahead_scheduled = True
+        self.window.after_idle(self._layout_ahead, self.document)
+
+    def _layout_ahead(self, document: DocumentLayout):
+        """
+        Keep layout a few screens ahead of the viewport while the window is
+        idle, a slice at a time so input is handled in between.
+        """
+        self.layout_ahead_scheduled = False
+        if document is not self.document:
+            # A newer navigation replaced this page
+            return
+        target = self.scroll + self.settings.window_height * (1 + LAYOUT_AHEAD_SCREENS)
+        deadline = time.monotonic() + LAYOUT_SLICE_SECONDS
+        while not self.layout_finished and document.laid_out_height() <= target:
+            if time.monotonic() >= deadline:
+                self._schedule_layout_ahead()
+                return
+            self._extend_layout(target, LAYOUT_SLICE_NODES)
+
+    def _first_paint(self, load: PageLoad):
+        """Report the first paint of `load` that puts something on screen."""
+        if self.painted_load is load or not self.display_list:
+            return
+        self.painted_load = load
+        if self.on_first_paint is not None:
+            self.on_first_paint(load.url, time.monotonic() - load.started)
 
     def draw(self):
         self.canvas.delete("all")
@@ -86,16 +295,24 @@ class Browser:
             self.canvas.create_text(x, y - self.scroll, text=c, font=f)
 
     def _close_window(self, _: tkinter.Event):
+        self.loader.cancel()
+        self.preloader.close()
+        self.connection_pool.close()
+        self.disk_cache.close()
         self.window.destroy()
 
     def _increase_font_size(self, _: tkinter.Event):
         self.settings.increase_font_size()
+        if self.document is None:
+            return
         self.document.increase_font_size()
         self.display_list = self.document.display_list
         self.draw()
 
     def _decrease_font_size(self, _: tkinter.Event):
         self.settings.decrease_font_size()
+        if self.document is None:
+            return
         self.document.decrease_font_size()
         self.display_list = self.document.display_list
         self.draw()
@@ -109,6 +326,13 @@ class Browser:
         self.draw()
 
     def _scroll_down(self, _: tkinter.Event):
+        self._extend_layout(
+            self.scroll
+            + self.settings.scroll_step
+            + self.settings.window_height
+            + LAYOUT_MARGIN
+        )
+        self._schedule_layout_ahead()
         if (
             self.scroll + self.settings.scroll_step
         ) > self._get_highest_y_position() - self.settings.scroll_step:
@@ -123,4 +347,6 @@ class Browser:
         self.draw()
 
     def _get_highest_y_position(self) -> int:
+        if not self.display_list:
+            return 0
         return self.display_list[-1][2]
@@ -9,7 +9,7 @@ from src.render.types import DisplayList
 class DocumentLayout:
     node: HTMLElement
     parent: Optional[HTMLElement]
-    children: List[HTMLElement]
+    children: List[BlockLayout]
     display_list: DisplayList
     settings: Settings
 
@@ -17,10 +17,27 @@ class DocumentLayout:
         self.node = node
         self.parent = None
         self.children = []
+        self.display_list = []
         self.settings = settings
 
     def layout(self):
-        child = BlockLayout(self.node, self, None, self.settings)
-        self.children.append(child)
-        child.layout()
-        self.display_list = child.display_list
+        self.layout_until()
+
+    def layout_until(
+        self, y: Optional[int] = None, max_nodes: Optional[int] = None
+    ) -> bool:
+        """Lay out lazily; see BlockLayout.layout_until."""
+        if not self.children:
+            child = BlockLayout(self.node, self, None, self.settings)
+            self.children.append(child)
+            # The block appends to this same list, so it fills in as layout runs
+            self.display_list = child.display_list
+        return self.children[0].layout_until(y, max_nodes)
+
+    def finished(self) -> bool:
+        """Whether the whole tree has been laid out."""
+        return bool(self.children) and self.children[0].finished
+
+    def laid_out_height(self) -> int:
+        """How far down the page layout has reached."""
+        return self.children[0].cursor_y if self.children else 0
@@ -1,3 +1,4 @@
+import sys
 from typing import List, Optional
 
 from src.render.attributes import Attributes
@@ -5,6 +6,8 @@ from src.render.base_element import BaseElement
 
 
 class Element(BaseElement):
+    __slots__ = ("tag", "attributes")
+
     tag: str
     parent: Optional[BaseElement]
     children: List[BaseElement]
@@ -17,7 +20,8 @@ class Element(BaseElement):
         children: List[BaseElement],
         attributes: Optional[Attributes],
     ):
-        self.tag = tag
+        # Interned so every <p> in the document shares one tag string
+        self.tag = sys.intern(tag)
         self.parent = parent
         self.children = children
         self.attributes = attributes
@@ -1,19 +1,23 @@
 import tkinter.font
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
 
+from src.render.base_element import BaseElement
 from src.render.element import Element
 from src.render.html_element import HTMLElement
 from src.render.settings import Settings
-from src.render.text import Text
+from src.render.text import TextNode
 from src.render.types import DisplayList, FontStyle, FontWeight
 
+if TYPE_CHECKING:
+    from src.render.document_layout import DocumentLayout
+
 TextLine = List[Tuple[str, int, tkinter.font.Font]]
 
 
 class BlockLayout:
     element: HTMLElement
-    parent: HTMLElement
-    previous: HTMLElement
+    parent: "DocumentLayout"
+    previous: Optional["BlockLayout"]
     children: List[HTMLElement]
 
     display_list: DisplayList
@@ -27,11 +31,16 @@ class BlockLayout:
     cursor_x: int
     cursor_y: int
 
+    # The open elements, each with an iterator over its remaining children;
+    # None until layout starts
+    stack: Optional[List[Tuple[Optional[Element], Iterator[BaseElement]]]]
+    finished: bool
+
     def __init__(
         self,
         element: HTMLElement,
-        parent: HTMLElement,
-        previous: HTMLElement,
+        parent: "DocumentLayout",
+        previous: Optional["BlockLayout"],
         settings: Settings,
     ):
         self.element = element
@@ -56,18 +65,48 @@ class BlockLayout:
         self.cursor_x = self.settings.HSTEP
         self.cursor_y = self.settings.VSTEP
 
+        self.stack = None
+        self.finished = False
+
     def layout(self):
-        self.recurse(self.element)
-        self.flush()
-
-    def recurse(self, tree: HTMLElement):
-        if isinstance(tree.element, Text):
-            self.layout_text(tree.element.text)
-        elif isinstance(tree.element, Element):
-            self.open_tag(tree.element)
-            for child in tree.element.children:
-                self.recurse(HTMLElement(child))
-            self.close_tag(tree.element)
+        self.layout_until()
+
+    def layout_until(
+        self, y: Optional[int] = None, max_nodes: Optional[int] = None
+    ) -> bool:
+        """
+        Lay out until the cursor passes `y` or `max_nodes` more nodes are done,
+        then stop, keeping the traversal position so the next call carries on
+        from there. Lines are appended to the display list top to bottom as
+        they are flushed. Returns whether the whole tree has been laid out.
+        """
+        if self.stack is None:
+            # The root is visited as the only child of a placeholder entry
+            self.stack = [(None, iter([self.element.element]))]
+        stack = self.stack
+        visited = 0
+        while stack:
+            if y is not None and self.cursor_y > y:
+                return False
+            if max_nodes is not None and visited >= max_nodes:
+                return False
+            element, children = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                if element is not None:
+                    self.close_tag(element)
+                continue
+            if isinstance(node, TextNode):
+                self.layout_text(node.text)
+            elif isinstance(node, Element):
+                self.open_tag(node)
+                stack.append((node, iter(node.children)))
+            visited += 1
+        if not self.finished:
+            self.flush()
+            self.finished = True
+        return True
 
     def flush(self):
         if not self.line or len(self.line) == 0:
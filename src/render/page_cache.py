@@ -0,0 +1,187 @@
+import hashlib
+import itertools
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterator, Optional, Set, Tuple, TypedDict
+
+from src.parser.html_parser import HTMLParser
+from src.render.base_element import BaseElement
+from src.render.document_layout import DocumentLayout
+from src.render.element import Element
+from src.render.html_element import HTMLElement
+from src.render.text import SourceText, Text
+from src.render.types import DisplayList
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+PageKey = Tuple[str, Hashable]
+
+
+class CachedPage(TypedDict):
+    nodes: HTMLElement
+    # Laid out only as far as the page has been viewed; showing it again
+    # carries on from there
+    document: DocumentLayout
+    # Estimated bytes held by the tree alone, and with its layout
+    tree_size: int
+    size: int
+
+
+class ParsedPage(TypedDict):
+    # None for documents that don't go through the page cache
+    key: Optional[PageKey]
+    # The cached page for the same content and layout, if there was one
+    page: Optional[CachedPage]
+    nodes: HTMLElement
+    tree_size: int
+
+
+class PageCache:
+    """
+    An LRU cache of parsed and laid out pages, bounded by their estimated
+    memory. Pages are keyed by a hash of the response body together with the
+    settings that affect layout, so the same content at the same width and
+    font size is never parsed or laid out twice.
+
+    Pages are stored when first shown, with their layout resumable, so long
+    pages that are never laid out to the end are reused too. Their size is
+    estimated again with update_size once their layout has grown.
+    """
+
+    cache: "OrderedDict[PageKey, CachedPage]"
+    max_bytes: int
+    size_bytes: int
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache = OrderedDict()
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # Pages are looked up by the loading thread and stored by the Tk one
+        self.lock = threading.Lock()
+
+    def get(self, key: PageKey) -> Optional[CachedPage]:
+        with self.lock:
+            page = self.cache.get(key)
+            if page is not None:
+                self.cache.move_to_end(key)
+            return page
+
+    def set(self, key: PageKey, document: DocumentLayout, tree_size: int) -> CachedPage:
+        page: CachedPage = {
+            "nodes": document.node,
+            "document": document,
+            "tree_size": tree_size,
+            "size": tree_size + estimate_display_list_size(document.display_list),
+        }
+        with self.lock:
+            if key in self.cache:
+                self.size_bytes -= self.cache.pop(key)["size"]
+            if page["size"] > self.max_bytes:
+                return page
+            self.cache[key] = page
+            self.size_bytes += page["size"]
+            self._evict()
+        return page
+
+    def update_size(self, key: PageKey):
+        """Estimate a stored page's size again after more of it is laid out."""
+        with self.lock:
+            page = self.cache.get(key)
+            if page is None:
+                return
+            display_list = page["document"].display_list
+            size = page["tree_size"] + estimate_display_list_size(display_list)
+            self.size_bytes += size - page["size"]
+            page["size"] = size
+            self._evict()
+
+    def _evict(self):
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self.cache.popitem(last=False)
+            self.size_bytes -= evicted["size"]
+
+    def parse(
+        self,
+        chunks: Iterator[str],
+        parser: HTMLParser,
+        layout_key: Hashable,
+        progress: Optional[Callable[[HTMLParser], None]] = None,
+    ) -> ParsedPage:
+        """
+        Parse the document streamed in `chunks` unless a cached page for the
+        same content and layout settings exists. Laying out a miss is left to
+        the caller, so parsing can run off the thread that owns the fonts.
+
+        A body that arrives as a single chunk, as cached responses do, is
+        looked up before parsing. Otherwise the body is parsed as it streams
+        in and hashed along the way, so the next load of it is a hit, and
+        `progress` is called with the parser after each chunk. The tree's
+        size is estimated here too, keeping that walk off the Tk thread.
+        """
+        content_hash = hashlib.sha256()
+        first = next(chunks, "")
+        content_hash.update(first.encode("utf8"))
+        second = next(chunks, None)
+        if second is None:
+            key = (content_hash.hexdigest(), layout_key)
+            page = self.get(key)
+            if page is not None:
+                return {
+                    "key": key,
+                    "page": page,
+                    "nodes": page["nodes"],
+                    "tree_size": page["tree_size"],
+                }
+            parser.feed(first)
+        else:
+            parser.feed(first)
+            if progress is not None:
+                progress(parser)
+            for chunk in itertools.chain([second], chunks):
+                content_hash.update(chunk.encode("utf8"))
+                parser.feed(chunk)
+                if progress is not None:
+                    progress(parser)
+            key = (content_hash.hexdigest(), layout_key)
+        nodes = parser.close()
+        return {
+            "key": key,
+            "page": None,
+            "nodes": nodes,
+            "tree_size": estimate_tree_size(nodes),
+        }
+
+    def get_capacity(self) -> int:
+        return len(self.cache)
+
+
+def estimate_display_list_size(display_list: DisplayList) -> int:
+    """Approximate the memory held by a display list."""
+    size = sys.getsizeof(display_list)
+    for entry in display_list:
+        # Fonts are shared through Settings, so only the word is counted
+        size += sys.getsizeof(entry) + sys.getsizeof(entry[0])
+    return size
+
+
+def estimate_tree_size(nodes: HTMLElement) -> int:
+    """Approximate the memory held by a parsed tree."""
+    size = 0
+    sources: Set[int] = set()
+    stack = [nodes.element]
+    while stack:
+        node: BaseElement = stack.pop()
+        size += sys.getsizeof(node)
+        if isinstance(node, SourceText):
+            if id(node.source) not in sources:
+                sources.add(id(node.source))
+                size += sys.getsizeof(node.source)
+        elif isinstance(node, Text):
+            size += sys.getsizeof(node.text)
+        elif isinstance(node, Element):
+            size += sys.getsizeof(node.children)
+            if node.attributes is not None:
+                size += sys.getsizeof(node.attributes.attributes)
+            stack.extend(node.children)
+    return size
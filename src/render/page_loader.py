@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from src.render.html_element import HTMLElement
+from src.render.page_cache import ParsedPage
+from src.utils.url import AbstractURL
+
+
+class LoadCancelled(Exception):
+    """Raised inside a load's worker once a newer navigation replaces it."""
+
+
+class PageLoad:
+    """One navigation: the URL, its cancellation flag and its outcome."""
+
+    url: AbstractURL
+    # time.monotonic() when the navigation started
+    started: float
+    parsed: Optional[ParsedPage]
+    error: Optional[BaseException]
+    # The newest snapshot of the partly parsed page, until the Tk thread
+    # takes it
+    partial: Optional[HTMLElement]
+    # Cleared by the Tk thread once a snapshot fills the viewport
+    wants_partial: bool
+    # time.monotonic() when the worker last took a snapshot
+    partial_at: float
+
+    def __init__(self, url: AbstractURL):
+        self.url = url
+        self.started = time.monotonic()
+        self.parsed = None
+        self.error = None
+        self.partial = None
+        self.wants_partial = True
+        self.partial_at = 0.0
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise LoadCancelled(str(self.url))
+
+    def set_partial(self, nodes: HTMLElement):
+        with self.lock:
+            self.partial = nodes
+
+    def take_partial(self) -> Optional[HTMLElement]:
+        """Return the snapshot set since the last call, if there is one."""
+        with self.lock:
+            nodes, self.partial = self.partial, None
+        return nodes
+
+    def guard(self, chunks: Iterator[str]) -> Iterator[str]:
+        """Pass `chunks` through, stopping the download once cancelled."""
+        try:
+            for chunk in chunks:
+                self.check()
+                yield chunk
+        finally:
+            # Closing the resolver's stream releases its connection now
+            # instead of whenever the generator is collected
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+
+class PageLoader:
+    """
+    Runs the network and parse stages of each load on a worker thread, so
+    the Tk thread stays free to handle input. Finished loads are handed back
+    through a queue that the Tk thread polls. Starting a load cancels the
+    one before it, and results of cancelled loads are never handed back.
+    """
+
+    work: Callable[[PageLoad], ParsedPage]
+    results: "queue.Queue[PageLoad]"
+    current: Optional[PageLoad]
+
+    def __init__(self, work: Callable[[PageLoad], ParsedPage]):
+        self.work = work
+        self.results = queue.Queue()
+        self.current = None
+
+    def start(self, url: AbstractURL) -> PageLoad:
+        self.cancel()
+        load = PageLoad(url)
+        self.current = load
+        threading.Thread(target=self._run, args=(load,), daemon=True).start()
+        return load
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def is_loading(self) -> bool:
+        return self.current is not None
+
+    def poll(self) -> Optional[PageLoad]:
+        """Return the current load if it has finished, without blocking."""
+        while True:
+            try:
+                load = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if load is self.current and not load.cancelled.is_set():
+                self.current = None
+                return load
+
+    def _run(self, load: PageLoad):
+        try:
+            load.parsed = self.work(load)
+        except LoadCancelled:
+            return
+        except BaseException as e:
+            load.error = e
+        self.results.put(load)
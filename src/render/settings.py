@@ -35,6 +35,17 @@ class Settings:
         ).metrics("linespace")
         self.font_cache = {}
 
+    def layout_key(self) -> Tuple[int, int, int, int, FontWeight, FontStyle]:
+        """The settings that change a page's layout, for keying cached layouts."""
+        return (
+            self.window_width,
+            self.HSTEP,
+            self.VSTEP,
+            self.default_font_size,
+            self.default_weight,
+            self.default_style,
+        )
+
     def resize(self, width: int, height: int):
         self.window_width = width
         self.window_height = height
@@ -1,19 +1,82 @@
-from typing import List, Optional
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence
 
-from src.render.base_element import BaseElement
+from src.parser.entities import decode_entities
+from src.render.base_element import EMPTY_CHILDREN, BaseElement
 
 
-class Text(BaseElement):
+class TextNode(BaseElement, ABC):
+    """A text leaf. Subclasses decide how `text` is stored."""
+
+    __slots__ = ()
+
+    parent: Optional[BaseElement]
+    children: Sequence[BaseElement]
+
+    @property
+    @abstractmethod
+    def text(self) -> str:
+        pass
+
+    def __str__(self):
+        return f"Text({self.text})"
+
+
+class Text(TextNode):
+    __slots__ = ("text",)
+
     text: str
     parent: Optional[BaseElement]
-    children: List[BaseElement]
+    children: Sequence[BaseElement]
 
     def __init__(
-        self, text: str, parent: Optional[BaseElement], children: List[BaseElement]
+        self,
+        text: str,
+        parent: Optional[BaseElement],
+        children: Sequence[BaseElement] = EMPTY_CHILDREN,
     ):
         self.text = text
         self.parent = parent
         self.children = children
 
-    def __str__(self):
-        return f"Text({self.text})"
+
+class SourceText(TextNode):
+    """
+    A text node that keeps offsets into the (immutable) source document
+    instead of its own copy of the text. The string is only built, stripped
+    and entity-decoded when `text` is read.
+    """
+
+    __slots__ = ("source", "start", "end")
+
+    source: str
+    start: int
+    end: int
+
+    def __init__(
+        self,
+        source: str,
+        start: int,
+        end: int,
+        parent: Optional[BaseElement],
+        children: Sequence[BaseElement] = EMPTY_CHILDREN,
+    ):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.parent = parent
+        self.children = children
+
+    @property
+    def text(self) -> str:
+        return decode_entities(self.source[self.start : self.end].strip())
+
+
+class RawSourceText(SourceText):
+    """A SourceText for raw-text elements like <script>, never entity-decoded."""
+
+    __slots__ = ()
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start : self.end].strip()
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+
+from src.networking.async_http_client import AsyncHTTPClient
+from src.networking.cache import BrowserCache
+from src.networking.disk_cache import DiskCache
+from src.networking.http_client import DEFAULT_TIMEOUT, REDIRECTS
+from src.networking.response import Response
+from src.networking.single_flight import Abandoned
+from src.resolver.http_resolver import IN_FLIGHT, HTTPResolver
+from src.utils.url import URL
+
+
+class AsyncHTTPResolver(HTTPResolver):
+    """
+    Resolves http(s) URLs on an event loop through an AsyncHTTPClient. Cache
+    lookups, revalidation and storage are the same as HTTPResolver's, so both
+    share one BrowserCache and DiskCache. The disk cache's sqlite index
+    blocks, so cache work runs on the loop's default executor. Fetches go
+    through the same in-flight table too, so a URL already being fetched by
+    either resolver is awaited rather than requested again.
+    """
+
+    client: AsyncHTTPClient
+
+    def __init__(
+        self,
+        url: URL,
+        cache: BrowserCache,
+        client: AsyncHTTPClient,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        super().__init__(url, cache, None, disk_cache)
+        self.client = client
+
+    async def resolve_async(self) -> str:
+        loop = asyncio.get_running_loop()
+        body, stale_response = await loop.run_in_executor(None, self._lookup)
+        if body is not None:
+            return body
+        response = await self._coalesced_fetch_async(stale_response)
+        return response.body
+
+    async def _coalesced_fetch_async(
+        self, stale_response: Optional[Response]
+    ) -> Response:
+        """The event loop side of _coalesced_fetch."""
+        key = self._flight_key()
+        future, leader = IN_FLIGHT.join(key)
+        if not leader:
+            try:
+                # Shielded, so giving up doesn't cancel the leader's future
+                response = await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)), DEFAULT_TIMEOUT
+                )
+            except (Abandoned, asyncio.TimeoutError):
+                # The leading load went away before finishing; fetch directly
+                return await self._fetch_async(stale_response)
+            self._validate_response(response)
+            return response
+
+        try:
+            response = await self._fetch_async(stale_response)
+        except asyncio.CancelledError:
+            IN_FLIGHT.fail(key, future, Abandoned())
+            raise
+        except BaseException as e:
+            IN_FLIGHT.fail(key, future, e)
+            raise
+        IN_FLIGHT.finish(key, future, response)
+        return response
+
+    async def _fetch_async(self, stale_response: Optional[Response]) -> Response:
+        # Skip hops already known to redirect permanently
+        url = REDIRECTS.resolve(self.url)
+        response = await self.client.fetch(self._create_request(url, stale_response))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._complete_response, response, stale_response
+        )
@@ -1,4 +1,6 @@
-from src.resolver.resolver import Resolver
+from typing import Iterator
+
+from src.resolver.resolver import STREAM_CHUNK_SIZE, Resolver
 from src.utils.url import FileURL, Scheme
 
 
@@ -13,3 +15,11 @@ class FileResolver(Resolver):
     def resolve(self) -> str:
         with open(self.url.path, "r") as f:
             return f.read()
+
+    def stream(self) -> Iterator[str]:
+        with open(self.url.path, "r") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
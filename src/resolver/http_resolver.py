@@ -1,55 +1,238 @@
-import base64
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Generator, Iterator, List, Optional, Tuple
 
-from src.networking.cache import BrowserCache
+from src.networking.cache import BrowserCache, CacheValue, is_revalidatable
+from src.networking.cache_control import CacheControl, freshness_lifetime
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import DiskCache
 from src.networking.headers import Headers
-from src.networking.http_client import HTTPClient
+from src.networking.http_client import DEFAULT_TIMEOUT, REDIRECTS, HTTPClient
 from src.networking.request import Request
 from src.networking.response import Response
+from src.networking.single_flight import Abandoned, SingleFlight
 from src.resolver.resolver import Resolver
 from src.utils.url import URL, Scheme
 
+NOT_MODIFIED = 304
+
+# Headers on a 304 that describe the connection or the transfer, not the
+# stored representation
+UNMERGED_304_HEADERS = {"connection", "content-length", "transfer-encoding"}
+
+# Network fetches in progress, so concurrent loads of a URL share one request
+IN_FLIGHT = SingleFlight()
+
 
 class HTTPResolver(Resolver):
     url: URL
     cache: BrowserCache
+    connection_pool: Optional[ConnectionPool]
+    disk_cache: Optional[DiskCache]
 
-    def __init__(self, url: URL, cache: BrowserCache):
+    def __init__(
+        self,
+        url: URL,
+        cache: BrowserCache,
+        connection_pool: Optional[ConnectionPool],
+        disk_cache: Optional[DiskCache] = None,
+    ):
         if url.scheme not in {Scheme.HTTP, Scheme.HTTPS}:
             raise ValueError(f"Unknown scheme {url.scheme}")
         self.url = url
         self.cache = cache
+        self.connection_pool = connection_pool
+        self.disk_cache = disk_cache
 
     def resolve(self) -> str:
+        return "".join(self.stream())
+
+    def stream(self) -> Iterator[str]:
+        body, stale_response = self._lookup()
+        if body is not None:
+            yield body
+            return
+        yield from self._coalesced_fetch(stale_response)
+
+    def _lookup(self) -> Tuple[Optional[str], Optional[Response]]:
+        """
+        Check the caches. Returns the body if it can be served without a
+        fetch, otherwise the stale response to revalidate, if there is one.
+        """
         # Check cache first
         cached_response = self.cache.get(str(self.url))
         if cached_response:
             self._validate_response(cached_response)
-            return cached_response.body
-        fresh_response = self._fetch_fresh_response()
-        self._validate_response(fresh_response)
+            return cached_response.body, None
+
+        # Then the disk cache, promoting hits into memory for their remaining lifetime
+        if self.disk_cache is not None:
+            disk_value = self.disk_cache.get(str(self.url))
+            if disk_value:
+                disk_response = disk_value["value"]
+                self._validate_response(disk_response)
+                max_age = int(disk_value["max_age"] - time.time())
+                if max_age > 0:
+                    self.cache.set(str(self.url), disk_response, max_age)
+                return disk_response.body, None
+
+        stale_value = self._get_stale()
+        if stale_value and self._is_servable_while_revalidating(stale_value):
+            stale_response = stale_value["value"]
+            self._validate_response(stale_response)
+            self._revalidate_in_background(stale_response)
+            return stale_response.body, None
+
+        # An expired entry with validators only needs to be revalidated
+        if stale_value and is_revalidatable(stale_value["value"]):
+            return None, stale_value["value"]
+        return None, None
+
+    def _coalesced_fetch(self, stale_response: Optional[Response]) -> Iterator[str]:
+        """
+        Fetch through the in-flight table. The first load of a URL streams it
+        from the network; loads that arrive meanwhile wait for its response
+        instead of sending their own request.
+        """
+        key = self._flight_key()
+        future, leader = IN_FLIGHT.join(key)
+        if not leader:
+            try:
+                response = future.result(timeout=DEFAULT_TIMEOUT)
+            except (Abandoned, FutureTimeout):
+                # The leading load went away before finishing; fetch directly
+                yield from self._fetch(stale_response)
+                return
+            self._validate_response(response)
+            yield response.body
+            return
+
+        try:
+            response = yield from self._fetch(stale_response)
+        except GeneratorExit:
+            IN_FLIGHT.fail(key, future, Abandoned())
+            raise
+        except BaseException as e:
+            IN_FLIGHT.fail(key, future, e)
+            raise
+        IN_FLIGHT.finish(key, future, response)
+
+    def _flight_key(self) -> str:
+        # Host names are case-insensitive
+        return f"{self.url.scheme}://{self.url.host.lower()}:{self.url.port}{self.url.path}"
+
+    def _fetch(
+        self, stale_response: Optional[Response]
+    ) -> Generator[str, None, Response]:
+        # Skip hops already known to redirect permanently
+        url = REDIRECTS.resolve(self.url)
+        http_client = HTTPClient(url, pool=self.connection_pool)
+        try:
+            fresh_response = http_client.start_request(
+                self._create_request(url, stale_response)
+            )
+            if fresh_response.status_code == NOT_MODIFIED and stale_response:
+                for _ in http_client.iter_body():
+                    pass
+                response = self._complete_response(fresh_response, stale_response)
+                yield response.body
+                return response
+            # Checked before streaming, so an error page is never parsed
+            self._validate_response(fresh_response)
+
+            chunks: List[str] = []
+            for chunk in http_client.iter_body():
+                chunks.append(chunk)
+                yield chunk
+            fresh_response.body = "".join(chunks)
+        finally:
+            http_client.close()
+        return self._complete_response(fresh_response, stale_response)
 
-        # Cache the fresh response if it has a valid max_age
-        self._cache_response(fresh_response, self.cache)
-        return fresh_response.body
+    def _complete_response(
+        self, response: Response, stale_response: Optional[Response]
+    ) -> Response:
+        """
+        Handle a response whose body has been read and return the one to
+        serve: a 304 refreshes and re-caches the stale response, anything else
+        must succeed and is cached if it is storable.
+        """
+        if response.status_code == NOT_MODIFIED and stale_response:
+            self._revalidated(stale_response, response)
+            return stale_response
+        self._validate_response(response)
+        self._cache_response(response, self.cache)
+        return response
 
     def _validate_response(self, response: Response):
         assert (
             response.status_code == 200
         ), f"{response.status_code}: {response.reason_phrase}"
-        assert "transfer-encoding" not in response.headers
-        assert "content-encoding" not in response.headers
 
-    def _fetch_fresh_response(self) -> Response:
-        headers = Headers.default(self.url.host)
-        request = Request(self.url, headers=headers)
-        http_client = HTTPClient(self.url)
-        return http_client.send_request(request)
+    def _get_stale(self) -> Optional[CacheValue]:
+        stale_value = self.cache.get_stale(str(self.url))
+        if stale_value is None and self.disk_cache is not None:
+            stale_value = self.disk_cache.get_stale(str(self.url))
+        return stale_value
+
+    def _is_servable_while_revalidating(self, stale_value: CacheValue) -> bool:
+        cache_control = CacheControl.parse(
+            stale_value["value"].headers.get_header("cache-control")
+        )
+        window = cache_control.seconds("stale-while-revalidate")
+        if (
+            window is None
+            or cache_control.has("must-revalidate")
+            or cache_control.has("no-cache")
+        ):
+            return False
+        return time.time() < stale_value["max_age"] + window
+
+    def _revalidate_in_background(self, stale_response: Response):
+        def refresh():
+            try:
+                for _ in self._coalesced_fetch(
+                    stale_response if is_revalidatable(stale_response) else None
+                ):
+                    pass
+            except Exception:
+                # A failed refresh leaves the stale entry for the next load
+                pass
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _create_request(
+        self, url: URL, stale_response: Optional[Response] = None
+    ) -> Request:
+        headers = Headers.default(url.host)
+        if stale_response is not None:
+            etag = stale_response.headers.get_header("etag")
+            last_modified = stale_response.headers.get_header("last-modified")
+            if etag:
+                headers.add_header("if-none-match", etag)
+            if last_modified:
+                headers.add_header("if-modified-since", last_modified)
+        return Request(url, headers=headers)
+
+    def _revalidated(self, stale_response: Response, response: Response):
+        """Update the stored headers with the ones sent on a 304 and re-cache."""
+        for header, value in response.headers:
+            if header not in UNMERGED_304_HEADERS:
+                stale_response.headers.add_header(header, value)
+        self._cache_response(stale_response, self.cache)
 
     def _cache_response(self, response: Response, cache: BrowserCache) -> None:
-        cache_control_header = response.headers.get_header("cache-control")
-        if cache_control_header is None or "no-store" in cache_control_header:
+        cache_control = CacheControl.parse(response.headers.get_header("cache-control"))
+        if cache_control.has("no-store"):
             return
 
-        if cache_control_header and "max-age=" in cache_control_header:
-            max_age = int(cache_control_header.split("=")[-1])
-            cache.set(str(self.url), response, max_age)
+        max_age = freshness_lifetime(response.headers)
+        if max_age is None:
+            if not is_revalidatable(response):
+                return
+            # Stored already stale, so the next load revalidates it
+            max_age = 0
+        cache.set(str(self.url), response, max_age)
+        if self.disk_cache is not None:
+            self.disk_cache.set(str(self.url), response, max_age)
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class Resolver(ABC):
     @abstractmethod
     def resolve(self) -> str:
         pass
+
+    def stream(self) -> Iterator[str]:
+        """
+        Yield the resolved document in chunks as they become available.
+
+        Resolvers that can produce data incrementally override this so the
+        parser can start working before the whole document has arrived.
+        """
+        yield self.resolve()
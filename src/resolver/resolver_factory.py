@@ -1,4 +1,8 @@
+from typing import Optional
+
 from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import DiskCache
 from src.resolver.data_resolver import DataResolver
 from src.resolver.file_resolver import FileResolver
 from src.resolver.http_resolver import HTTPResolver
@@ -8,9 +12,14 @@ from src.utils.url import URL, AbstractURL, DataURL, FileURL
 
 class ResolverFactory:
     @staticmethod
-    def create(url: AbstractURL, cache: BrowserCache) -> Resolver:
+    def create(
+        url: AbstractURL,
+        cache: BrowserCache,
+        connection_pool: ConnectionPool,
+        disk_cache: Optional[DiskCache] = None,
+    ) -> Resolver:
         if isinstance(url, URL):
-            return HTTPResolver(url, cache)
+            return HTTPResolver(url, cache, connection_pool, disk_cache)
         elif isinstance(url, FileURL):
             return FileResolver(url)
         elif isinstance(url, DataURL):
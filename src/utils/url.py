@@ -1,7 +1,10 @@
+import re
 from abc import ABC, abstractmethod
 from enum import Enum
 from os import path
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
+
+URL_SCHEME = re.compile(r"([a-zA-Z][a-zA-Z0-9+.-]*):")
 
 
 class Scheme(Enum):
@@ -54,7 +57,8 @@ class URL(AbstractURL):
 
     def _extract_scheme(self, url: str) -> Tuple[Scheme, str]:
         scheme_str, url = url.split("://", 1)
-        scheme = Scheme(scheme_str)
+        # Schemes are case-insensitive
+        scheme = Scheme(scheme_str.lower())
         self.port = self.DEFAULT_PORTS[scheme]
         return scheme, url
 
@@ -67,10 +71,59 @@ class URL(AbstractURL):
             self.port = int(port)
         return host, "/" + path
 
+    def resolve(self, href: str) -> "URL":
+        """
+        The URL that `href`, found in a document at this URL, points to.
+        Raises ValueError for schemes other than http and https, like
+        mailto:, javascript: and data:.
+        """
+        href = href.strip().split("#", 1)[0]
+        scheme = URL_SCHEME.match(href)
+        if scheme is not None:
+            name = scheme.group(1).lower()
+            if name not in (str(Scheme.HTTP), str(Scheme.HTTPS)):
+                raise ValueError(f"Can't resolve a {name}: URL")
+            rest = href[scheme.end() :]
+            if rest.startswith("//"):
+                return URL(f"{name}:{rest}")
+            if name != str(self.scheme):
+                return URL(f"{name}://{rest.lstrip('/')}")
+            # "http:page" on an http page is relative to it
+            href = rest
+        if href.startswith("//"):
+            return URL(f"{self.scheme}:{href}")
+        if href.startswith("/"):
+            path = href
+        elif href.startswith("?"):
+            path = self.path.split("?", 1)[0] + href
+        else:
+            directory = self.path.split("?", 1)[0].rsplit("/", 1)[0]
+            path = f"{directory}/{href}"
+        return URL(f"{self.scheme}://{self.host}:{self.port}{_remove_dots(path)}")
+
     def __str__(self) -> str:
         return f"{self.scheme}://{self.host}:{self.port}{self.path}"
 
 
+def _remove_dots(path: str) -> str:
+    """Collapse "." and ".." segments in an absolute path."""
+    path, query_mark, query = path.partition("?")
+    segments: List[str] = []
+    parts = path.split("/")[1:]
+    for idx, segment in enumerate(parts):
+        last = idx == len(parts) - 1
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+            continue
+        if last:
+            # Keep the trailing slash of "a/.." and "a/."
+            segments.append("")
+    return "/" + "/".join(segments) + query_mark + query
+
+
 class DataURL(AbstractURL):
     scheme: Scheme
     media_type: str
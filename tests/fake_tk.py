@@ -0,0 +1,69 @@
+import time
+from typing import Callable, List, Tuple
+
+
+class FakeFont:
+    """
+    A stand-in for tkinter.font.Font, which needs a display. Every character
+    is 8 pixels wide and lines are 4 pixels taller than the font size.
+    """
+
+    def __init__(self, family="Times", size=16, weight="normal", slant="roman"):
+        self.size = size
+
+    def measure(self, text: str) -> int:
+        return len(text) * 8
+
+    def metrics(self, *options: str):
+        metrics = {"ascent": self.size, "linespace": self.size + 4}
+        return metrics[options[0]] if options else metrics
+
+
+class FakeTk:
+    """A stand-in for tkinter.Tk that queues scheduled callbacks until run."""
+
+    callbacks: List[Tuple[Callable, tuple]]
+
+    def __init__(self):
+        self.callbacks = []
+
+    def bind(self, *_):
+        pass
+
+    def after(self, _: int, callback: Callable, *args):
+        self.callbacks.append((callback, args))
+
+    def after_idle(self, callback: Callable, *args):
+        self.callbacks.append((callback, args))
+
+    def destroy(self):
+        self.callbacks = []
+
+    def run_until(self, condition: Callable[[], bool], timeout: float = 5.0):
+        """Run queued callbacks, as the Tk main loop would, until `condition`."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("condition not reached")
+            callbacks, self.callbacks = self.callbacks, []
+            for callback, args in callbacks:
+                callback(*args)
+            time.sleep(0.005)
+
+
+class FakeCanvas:
+    """A stand-in for tkinter.Canvas that records the text drawn on it."""
+
+    texts: List[str]
+
+    def __init__(self, *_, **__):
+        self.texts = []
+
+    def pack(self, **_):
+        pass
+
+    def delete(self, *_):
+        self.texts = []
+
+    def create_text(self, x: float, y: float, text: str, font=None):
+        self.texts.append(text)
@@ -0,0 +1,89 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+Route = Tuple[int, Dict[str, str], bytes]
+
+
+class LocalServer:
+    """
+    A threaded HTTP/1.1 server on localhost for exercising the networking
+    code. Each route maps a path to (status, headers, body); a body is sent
+    chunked when the route's headers ask for it. Every response can be held
+    back by `delay` seconds to keep requests in flight; `max_in_flight`
+    records how many were ever served at once.
+    """
+
+    routes: Dict[str, Route]
+    requests: List[Tuple[str, Dict[str, str]]]
+    connections: int
+    delay: float
+    in_flight: int
+    max_in_flight: int
+
+    def __init__(self, routes: Dict[str, Route], delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def __enter__(self) -> "LocalServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers.items())))
+                status, headers, body = server.routes[self.path]
+                with server.lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.in_flight -= 1
+                self.send_response(status)
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                chunked = headers.get("Transfer-Encoding") == "chunked"
+                if not chunked and "Content-Length" not in headers:
+                    if headers.get("Connection") == "close":
+                        self.close_connection = True
+                    else:
+                        self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if chunked:
+                    third = max(1, len(body) // 3)
+                    for idx in range(0, len(body), third):
+                        chunk = body[idx : idx + third]
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
@@ -0,0 +1,214 @@
+import asyncio
+import gzip
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from src.networking.async_http_client import AsyncHTTPClient
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import DiskCache
+from src.networking.headers import Headers
+from src.networking.http_client import RequestTimeout
+from src.networking.request import Request
+from src.resolver.async_http_resolver import AsyncHTTPResolver
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+
+def request(url: str) -> Request:
+    parsed = URL(url)
+    return Request(parsed, headers=Headers.default(parsed.host))
+
+
+class TestAsyncHTTPClient(TestCase):
+    def fetch_all(self, client: AsyncHTTPClient, urls):
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(client.fetch(request(url)) for url in urls)
+                )
+            finally:
+                await client.close()
+
+        return asyncio.run(run())
+
+    def test_keep_alive_connection_is_reused(self):
+        routes = {"/": (200, {}, b"hello")}
+        with LocalServer(routes) as server:
+            client = AsyncHTTPClient()
+
+            async def run():
+                first = await client.fetch(request(server.url("/")))
+                second = await client.fetch(request(server.url("/")))
+                assert client.size() == 1
+                await client.close()
+                return first, second
+
+            first, second = asyncio.run(run())
+            assert first.body == second.body == "hello"
+            assert server.connections == 1
+
+    def test_chunked_and_gzip_bodies(self):
+        routes = {
+            "/chunked": (200, {"Transfer-Encoding": "chunked"}, b"chunked body"),
+            "/gzip": (200, {"Content-Encoding": "gzip"}, gzip.compress(b"unzipped")),
+            "/close": (200, {"Connection": "close"}, b"until close"),
+        }
+        with LocalServer(routes) as server:
+            responses = self.fetch_all(
+                AsyncHTTPClient(),
+                [server.url("/chunked"), server.url("/gzip"), server.url("/close")],
+            )
+            assert [r.body for r in responses] == [
+                "chunked body",
+                "unzipped",
+                "until close",
+            ]
+
+    def test_follows_redirects(self):
+        routes = {
+            "/old": (302, {"Location": "/new"}, b""),
+            "/new": (200, {}, b"moved"),
+        }
+        with LocalServer(routes) as server:
+            (response,) = self.fetch_all(AsyncHTTPClient(), [server.url("/old")])
+            assert response.body == "moved"
+            assert [path for path, _ in server.requests] == ["/old", "/new"]
+
+    def test_concurrency_is_bounded_per_host(self):
+        routes = {f"/{idx}": (200, {}, b"%d" % idx) for idx in range(8)}
+        with LocalServer(routes, delay=0.1) as server:
+            client = AsyncHTTPClient(max_per_host=2)
+            responses = self.fetch_all(client, [server.url(path) for path in routes])
+            assert [r.body for r in responses] == [str(idx) for idx in range(8)]
+            assert server.max_in_flight == 2
+            assert server.connections == 2
+
+    def test_timeout(self):
+        routes = {"/": (200, {}, b"slow")}
+        with LocalServer(routes, delay=1) as server:
+            start = time.monotonic()
+            with self.assertRaises(RequestTimeout) as context:
+                self.fetch_all(AsyncHTTPClient(timeout=0.2), [server.url("/")])
+            assert time.monotonic() - start < 1
+            assert "timed out after 0.2s" in str(context.exception)
+
+
+class TestAsyncHTTPResolver(TestCase):
+    def test_second_load_is_served_from_cache(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60"}, b"cached")}
+        with LocalServer(routes) as server:
+            cache = BrowserCache()
+            client = AsyncHTTPClient()
+            url = URL(server.url("/"))
+
+            async def run():
+                first = await AsyncHTTPResolver(url, cache, client).resolve_async()
+                second = await AsyncHTTPResolver(url, cache, client).resolve_async()
+                await client.close()
+                return first, second
+
+            assert asyncio.run(run()) == ("cached", "cached")
+            assert len(server.requests) == 1
+            assert cache.get_capacity() == 1
+
+    def test_revalidates_stale_entry(self):
+        routes = {"/": (200, {"ETag": '"v1"'}, b"original")}
+        with LocalServer(routes) as server:
+            cache = BrowserCache()
+            client = AsyncHTTPClient()
+            url = URL(server.url("/"))
+
+            async def run():
+                first = await AsyncHTTPResolver(url, cache, client).resolve_async()
+                routes["/"] = (304, {"ETag": '"v1"'}, b"")
+                second = await AsyncHTTPResolver(url, cache, client).resolve_async()
+                await client.close()
+                return first, second
+
+            assert asyncio.run(run()) == ("original", "original")
+            assert server.requests[1][1]["if-none-match"] == '"v1"'
+
+    def test_concurrent_loads_share_one_request(self):
+        routes = {"/": (200, {}, b"shared")}
+        with LocalServer(routes, delay=0.2) as server:
+            client = AsyncHTTPClient()
+            url = URL(server.url("/"))
+
+            async def run():
+                try:
+                    return await asyncio.gather(
+                        *(
+                            AsyncHTTPResolver(
+                                url, BrowserCache(), client
+                            ).resolve_async()
+                            for _ in range(4)
+                        )
+                    )
+                finally:
+                    await client.close()
+
+            assert asyncio.run(run()) == ["shared"] * 4
+            assert len(server.requests) == 1
+
+    def test_load_joins_a_fetch_in_flight_on_another_thread(self):
+        routes = {"/": (200, {}, b"shared")}
+        with LocalServer(routes, delay=0.3) as server:
+            url = URL(server.url("/"))
+            pool = ConnectionPool()
+            thread_body = []
+            thread = threading.Thread(
+                target=lambda: thread_body.append(
+                    HTTPResolver(url, BrowserCache(), pool).resolve()
+                )
+            )
+            thread.start()
+            while not server.requests:
+                time.sleep(0.01)
+            client = AsyncHTTPClient()
+
+            async def run():
+                try:
+                    resolver = AsyncHTTPResolver(url, BrowserCache(), client)
+                    return await resolver.resolve_async()
+                finally:
+                    await client.close()
+
+            assert asyncio.run(run()) == "shared"
+            thread.join()
+            pool.close()
+            assert thread_body == ["shared"]
+            assert len(server.requests) == 1
+
+    def test_disk_cache_is_used_off_the_event_loop(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60"}, b"stored")}
+        threads = []
+
+        class RecordingDiskCache(DiskCache):
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return super().get(key)
+
+            def set(self, key, value, max_age=60):
+                threads.append(threading.get_ident())
+                super().set(key, value, max_age)
+
+        with LocalServer(routes) as server, tempfile.TemporaryDirectory() as tmp:
+            disk_cache = RecordingDiskCache(tmp)
+            client = AsyncHTTPClient()
+            url = URL(server.url("/"))
+
+            async def run():
+                resolver = AsyncHTTPResolver(url, BrowserCache(), client, disk_cache)
+                body = await resolver.resolve_async()
+                await client.close()
+                return body, threading.get_ident()
+
+            body, loop_thread = asyncio.run(run())
+            disk_cache.close()
+            assert body == "stored"
+            assert len(threads) == 2
+            assert loop_thread not in threads
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.render.browser import Browser
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL, FileURL
+from tests.fake_tk import FakeCanvas, FakeFont, FakeTk
+
+URL_STRING = "http://example.com/"
+
+
+class GatedResolver(HTTPResolver):
+    """Streams `chunks`, holding back all but the first two until `gate` is set."""
+
+    def __init__(self, chunks: List[str], gate: threading.Event):
+        super().__init__(URL(URL_STRING), BrowserCache(), ConnectionPool())
+        self.chunks = chunks
+        self.gate = gate
+
+    def stream(self):
+        yield from self.chunks[:2]
+        self.gate.wait(5)
+        yield from self.chunks[2:]
+
+
+class TestBrowser(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for patcher in (
+            patch("tkinter.Tk", FakeTk),
+            patch("tkinter.Canvas", FakeCanvas),
+            patch("tkinter.font.Font", FakeFont),
+            patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp.name}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.browser = Browser()
+        self.addCleanup(self.browser._close_window, None)
+        self.paints = []
+        self.browser.on_first_paint = lambda url, seconds: self.paints.append(
+            (str(url), seconds)
+        )
+        self.gate = threading.Event()
+        self.addCleanup(self.gate.set)
+
+    def load(self, chunks: List[str]):
+        resolver = GatedResolver(chunks, self.gate)
+        with patch("src.render.browser.ResolverFactory.create", return_value=resolver):
+            self.browser.load(URL(URL_STRING))
+
+    def words(self) -> List[str]:
+        return [word for word, _, _, _ in self.browser.display_list]
+
+    def test_page_is_painted_before_it_finishes_parsing(self):
+        self.load(
+            [
+                "<html><body><p>early</p>",
+                "<p>middle</p>",
+                "<p>late</p></body></html>",
+            ]
+        )
+        window = self.browser.window
+        window.run_until(lambda: len(self.paints) > 0)
+        assert self.browser.loader.is_loading()
+        assert "early" in self.words()
+        assert "late" not in self.words()
+        assert "early" in self.browser.canvas.texts
+        assert self.paints[0][0] == "http://example.com:80/"
+
+        self.gate.set()
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        window.run_until(lambda: "late" in self.words())
+        assert self.browser.partial_load is None
+        assert self.words() == ["early", "middle", "late"]
+        assert len(self.paints) == 1
+
+    def test_page_parsed_in_one_go_is_painted_once(self):
+        self.gate.set()
+        self.load(["<p>only chunk</p>"])
+        window = self.browser.window
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        assert self.words() == ["only", "chunk"]
+        assert len(self.paints) == 1
+        assert self.paints[0][1] >= 0
+
+    def test_partly_laid_out_page_is_cached_and_resumed(self):
+        self.gate.set()
+        page = "<p>a long page of words</p>" * 500
+        self.load([page])
+        window = self.browser.window
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        document = self.browser.document
+        window.run_until(lambda: not self.browser.layout_ahead_scheduled)
+        assert not self.browser.layout_finished
+        assert self.browser.page_cache.get_capacity() == 1
+        laid_out = document.laid_out_height()
+
+        self.load([page])
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        assert self.browser.document is document
+        assert document.laid_out_height() == laid_out
+
+    def test_streamed_page_reuses_the_cached_layout_on_reload(self):
+        self.gate.set()
+        chunks = ["<p>first part</p>", "<p>second part</p>", "<p>third part</p>"]
+        self.load(chunks)
+        window = self.browser.window
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        document = self.browser.document
+        assert self.browser.page_cache.get_capacity() == 1
+
+        self.load(chunks)
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        assert self.browser.document is document
+        assert self.browser.page_cache.get_capacity() == 1
+        assert self.words() == ["first", "part", "second", "part", "third", "part"]
+
+    def test_first_paint_waits_for_something_to_draw(self):
+        self.browser.on_first_paint = lambda url, seconds: self.paints.append(
+            list(self.words())
+        )
+        self.load(["<html><head>", "<title></title></head>", "<p>body</p></html>"])
+        window = self.browser.window
+        window.run_until(lambda: self.browser.partial_load is not None)
+        assert self.words() == []
+        assert self.paints == []
+
+        self.gate.set()
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        assert self.paints == [["body"]]
+
+    def test_local_html_page_is_streamed_and_cached(self):
+        path = os.path.join(self.tmp.name, "page.html")
+        with open(path, "w") as f:
+            f.write("<p>a local page</p>" * 2000)
+        url = FileURL(f"file://{path}")
+        self.browser.load(url)
+        window = self.browser.window
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        document = self.browser.document
+        assert self.words()[:3] == ["a", "local", "page"]
+        assert self.paints[0][0] == str(url)
+        assert self.browser.page_cache.get_capacity() == 1
+
+        self.browser.load(url)
+        window.run_until(lambda: not self.browser.loader.is_loading())
+        assert self.browser.document is document
@@ -6,6 +6,12 @@ from src.networking.headers import Headers
 from src.networking.response import Response
 
 
+def cache_size(response: Response) -> int:
+    cache = BrowserCache()
+    cache.set("key", response)
+    return cache.size_bytes
+
+
 class TestCache(TestCase):
     def test_basic_set_get(self):
         cache = BrowserCache()
@@ -77,3 +83,72 @@ class TestCache(TestCase):
 
         cache.get("test_key1")  # Accessing should not change the size
         self.assertEqual(cache.get_capacity(), 2)
+
+    def test_get_refreshes_recency(self):
+        cache = BrowserCache(capacity=2)
+        resp = Response(200, "OK", Headers({"Content-Type": "text/plain"}), "data")
+        cache.set("test_key1", resp)
+        cache.set("test_key2", resp)
+        cache.get("test_key1")
+        cache.set("test_key3", resp)  # This should evict test_key2
+
+        self.assertEqual(cache.get("test_key1"), resp)
+        self.assertIsNone(cache.get("test_key2"))
+        self.assertEqual(cache.get("test_key3"), resp)
+
+    def test_eviction_due_to_byte_budget(self):
+        small = Response(200, "OK", Headers(), "x" * 100)
+        cache = BrowserCache(max_bytes=3 * cache_size(small))
+        for key in ("test_key1", "test_key2", "test_key3", "test_key4"):
+            cache.set(key, small)
+
+        self.assertIsNone(cache.get("test_key1"))
+        self.assertEqual(cache.get_capacity(), 3)
+        self.assertLessEqual(cache.size_bytes, cache.max_bytes)
+
+    def test_oversized_response_is_not_cached(self):
+        cache = BrowserCache(max_bytes=1000)
+        small = Response(200, "OK", Headers(), "small")
+        large = Response(200, "OK", Headers(), "x" * 5000)
+        cache.set("test_key1", small)
+        cache.set("test_key2", large)
+
+        self.assertIsNone(cache.get("test_key2"))
+        self.assertEqual(cache.get("test_key1"), small)
+
+    def test_expired_entries_are_reaped_on_set(self):
+        cache = BrowserCache()
+        resp = Response(200, "OK", Headers(), "data")
+        cache.set("test_key1", resp, max_age=0)
+        cache.set("test_key2", resp, max_age=60)
+
+        self.assertEqual(cache.get_capacity(), 1)
+        self.assertEqual(cache.size_bytes, cache_size(resp))
+
+    def test_update_replaces_size_and_expiry(self):
+        cache = BrowserCache()
+        cache.set("test_key1", Response(200, "OK", Headers(), "x" * 1000), max_age=0)
+        resp = Response(200, "OK", Headers(), "small")
+        cache.set("test_key1", resp, max_age=60)
+
+        self.assertEqual(cache.get("test_key1"), resp)
+        self.assertEqual(cache.size_bytes, cache_size(resp))
+
+    def test_expired_entry_with_validator_is_kept_stale(self):
+        cache = BrowserCache()
+        resp = Response(200, "OK", Headers({"etag": '"v1"'}), "test_data")
+        cache.set("test_key", resp, max_age=0)
+        cache.set("other_key", resp, max_age=0)
+
+        self.assertIsNone(cache.get("test_key"))
+        self.assertEqual(cache.get_stale("test_key")["value"], resp)
+        self.assertEqual(cache.get_capacity(), 2)
+
+    def test_expired_entry_without_validator_is_dropped(self):
+        cache = BrowserCache()
+        resp = Response(200, "OK", Headers({"content-type": "text/plain"}), "data")
+        cache.set("test_key", resp, max_age=0)
+
+        self.assertIsNone(cache.get("test_key"))
+        self.assertIsNone(cache.get_stale("test_key"))
+        self.assertEqual(cache.get_capacity(), 0)
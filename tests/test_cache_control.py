@@ -0,0 +1,65 @@
+from email.utils import formatdate
+from unittest import TestCase
+
+from src.networking.cache_control import CacheControl, freshness_lifetime
+from src.networking.headers import Headers
+
+NOW = 1_700_000_000.0
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+class TestCacheControl(TestCase):
+    def test_parse_directives(self):
+        cache_control = CacheControl.parse(
+            'max-age=60, Public, no-cache="set-cookie, x-id", stale-while-revalidate=30'
+        )
+        assert cache_control.seconds("max-age") == 60
+        assert cache_control.has("public")
+        assert cache_control.directives["no-cache"] == "set-cookie, x-id"
+        assert cache_control.seconds("stale-while-revalidate") == 30
+        assert not cache_control.has("x-id")
+
+    def test_parse_empty_and_invalid(self):
+        assert CacheControl.parse(None).directives == {}
+        cache_control = CacheControl.parse("max-age=soon, max-age=10")
+        assert cache_control.has("max-age")
+        assert cache_control.seconds("max-age") is None
+
+
+class TestFreshnessLifetime(TestCase):
+    def test_max_age_with_trailing_directives(self):
+        headers = Headers({"cache-control": "max-age=60, public"})
+        assert freshness_lifetime(headers, NOW) == 60
+
+    def test_max_age_less_age(self):
+        headers = Headers({"cache-control": "max-age=60", "age": "15"})
+        assert freshness_lifetime(headers, NOW) == 45
+
+    def test_apparent_age_from_date(self):
+        headers = Headers(
+            {"cache-control": "max-age=60", "date": http_date(NOW - 20), "age": "5"}
+        )
+        assert freshness_lifetime(headers, NOW) == 40
+
+    def test_max_age_overrides_expires(self):
+        headers = Headers(
+            {"cache-control": "max-age=10", "expires": http_date(NOW + 600)}
+        )
+        assert freshness_lifetime(headers, NOW) == 10
+
+    def test_expires_relative_to_date(self):
+        headers = Headers({"date": http_date(NOW), "expires": http_date(NOW + 300)})
+        assert freshness_lifetime(headers, NOW) == 300
+
+    def test_invalid_expires_is_stale(self):
+        assert freshness_lifetime(Headers({"expires": "0"}), NOW) == 0
+
+    def test_no_cache_is_stale(self):
+        headers = Headers({"cache-control": "no-cache, max-age=60"})
+        assert freshness_lifetime(headers, NOW) == 0
+
+    def test_no_explicit_freshness(self):
+        assert freshness_lifetime(Headers({"etag": '"v1"'}), NOW) is None
@@ -0,0 +1,63 @@
+import socket
+from time import sleep
+from unittest import TestCase
+
+from src.networking.connection_pool import ConnectionPool
+from src.utils.url import URL, Scheme
+
+KEY = (Scheme.HTTP, "example.com", 80)
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        self.peers = []
+
+    def tearDown(self):
+        for peer in self.peers:
+            peer.close()
+
+    def connection(self) -> socket.socket:
+        s, peer = socket.socketpair()
+        self.peers.append(peer)
+        return s
+
+    def test_key(self):
+        assert ConnectionPool.key(URL("https://example.com:8443/a")) == (
+            Scheme.HTTPS,
+            "example.com",
+            8443,
+        )
+
+    def test_release_then_acquire(self):
+        pool = ConnectionPool()
+        s = self.connection()
+        assert pool.acquire(KEY) is None
+        pool.release(KEY, s)
+        assert pool.size() == 1
+        assert pool.acquire(KEY) is s
+        assert pool.acquire(KEY) is None
+        s.close()
+
+    def test_per_host_limit(self):
+        pool = ConnectionPool(max_idle_per_host=1)
+        first, second = self.connection(), self.connection()
+        pool.release(KEY, first)
+        pool.release(KEY, second)
+        assert pool.size() == 1
+        assert second.fileno() == -1
+        pool.close()
+
+    def test_idle_timeout(self):
+        pool = ConnectionPool(idle_timeout=0.1)
+        s = self.connection()
+        pool.release(KEY, s)
+        sleep(0.2)
+        assert pool.acquire(KEY) is None
+        assert s.fileno() == -1
+
+    def test_connection_closed_by_peer_is_dropped(self):
+        pool = ConnectionPool()
+        s = self.connection()
+        pool.release(KEY, s)
+        self.peers.pop().close()
+        assert pool.acquire(KEY) is None
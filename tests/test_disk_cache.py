@@ -0,0 +1,206 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.disk_cache import STALE_TMP_SECONDS, DiskCache
+from src.networking.headers import Headers
+from src.networking.response import Response
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+
+def response(body: str, etag: str = '"v1"') -> Response:
+    headers = Headers({"content-type": "text/html"})
+    if etag:
+        headers.add_header("etag", etag)
+    return Response(200, "OK", headers, body)
+
+
+def body_files(cache: DiskCache) -> list:
+    return os.listdir(cache.bodies_directory)
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persists_across_instances(self):
+        cache = DiskCache(self.directory)
+        cache.set("http://example.org/", response("héllo"), max_age=60)
+        cache.close()
+
+        cache = DiskCache(self.directory)
+        cached = cache.get("http://example.org/")
+        assert cached is not None
+        assert cached["value"].body == "héllo"
+        assert cached["value"].status_code == 200
+        assert cached["value"].headers.get_header("etag") == '"v1"'
+        assert cached["max_age"] > time.time() + 50
+        cache.close()
+
+    def test_miss_and_expiry(self):
+        cache = DiskCache(self.directory)
+        assert cache.get("http://example.org/") is None
+        cache.set("http://example.org/", response("old", etag=""), max_age=0)
+        assert cache.get("http://example.org/") is None
+        assert cache.get_stale("http://example.org/") is None
+        assert body_files(cache) == []
+        cache.close()
+
+    def test_expired_entry_with_validator_is_kept_stale(self):
+        cache = DiskCache(self.directory)
+        cache.set("http://example.org/", response("old"), max_age=0)
+        cache.set("http://example.org/other", response("new", etag=""))
+        assert cache.get("http://example.org/") is None
+        stale = cache.get_stale("http://example.org/")
+        assert stale["value"].body == "old"
+        assert stale["value"].headers.get_header("etag") == '"v1"'
+        cache.close()
+
+    def test_bodies_are_content_addressed(self):
+        cache = DiskCache(self.directory)
+        cache.set("http://example.org/a", response("same"))
+        cache.set("http://example.org/b", response("same"))
+        cache.flush()
+        assert len(body_files(cache)) == 1
+        assert cache.size_bytes() == len("same")
+
+        cache.set("http://example.org/a", response("different"))
+        cache.flush()
+        assert len(body_files(cache)) == 2
+        cache.set("http://example.org/b", response("different"))
+        cache.flush()
+        assert len(body_files(cache)) == 1
+        cache.close()
+
+    def test_empty_body(self):
+        cache = DiskCache(self.directory)
+        cache.set("http://example.org/", response(""))
+        assert cache.get("http://example.org/")["value"].body == ""
+        cache.close()
+
+    def test_evicts_least_recently_used_over_budget(self):
+        cache = DiskCache(self.directory, max_bytes=250)
+        cache.set("a", response("a" * 100))
+        cache.set("b", response("b" * 100))
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", response("c" * 100))
+        cache.flush()
+
+        assert cache.get("b") is None
+        assert cache.get("a")["value"].body == "a" * 100
+        assert cache.get("c")["value"].body == "c" * 100
+        assert cache.size_bytes() <= 250
+        assert len(body_files(cache)) == 2
+        cache.close()
+
+    def test_oversized_body_is_not_stored(self):
+        cache = DiskCache(self.directory, max_bytes=10)
+        cache.set("a", response("a" * 100))
+        assert cache.get("a") is None
+        assert body_files(cache) == []
+        cache.close()
+
+    def test_missing_body_file_is_a_miss(self):
+        cache = DiskCache(self.directory)
+        cache.set("a", response("body"))
+        cache.flush()
+        for name in body_files(cache):
+            os.remove(os.path.join(cache.bodies_directory, name))
+        assert cache.get("a") is None
+        assert cache.size_bytes() == 0
+        cache.close()
+
+    def test_stale_temporary_bodies_are_removed_on_start(self):
+        cache = DiskCache(self.directory)
+        cache.close()
+        stale = os.path.join(cache.bodies_directory, "crashed.tmp")
+        in_progress = os.path.join(cache.bodies_directory, "writing.tmp")
+        for path in (stale, in_progress):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+        old = time.time() - STALE_TMP_SECONDS - 1
+        os.utime(stale, (old, old))
+
+        cache = DiskCache(self.directory)
+        assert body_files(cache) == ["writing.tmp"]
+        cache.close()
+
+    def test_body_rename_is_fsynced(self):
+        cache = DiskCache(self.directory)
+        with patch("src.networking.disk_cache.os.fsync") as fsync:
+            cache.set("a", response("body"))
+            cache.flush()
+        # Once for the body, once for the directory holding its new name
+        assert fsync.call_count == 2
+        cache.close()
+
+    def test_set_returns_before_the_write_and_get_waits_for_it(self):
+        cache = DiskCache(self.directory)
+        cache.set("a", response("first"))
+        cache.flush()
+        release = threading.Event()
+        write_body = cache._write_body
+
+        def slow_write_body(body_hash, body):
+            release.wait(5)
+            write_body(body_hash, body)
+
+        with patch.object(cache, "_write_body", slow_write_body):
+            cache.set("b", response("second"))
+            assert "b" in cache.pending
+            # Other keys don't wait for the queued write
+            assert cache.get("a")["value"].body == "first"
+            release.set()
+            assert cache.get("b")["value"].body == "second"
+        assert cache.pending == {}
+        cache.close()
+
+    def test_eviction_uses_the_running_total(self):
+        cache = DiskCache(self.directory, max_bytes=250)
+        with patch.object(cache, "_size_bytes") as size_bytes:
+            for name in "abcd":
+                cache.set(name, response(name * 100))
+            assert cache.size_bytes() == 200
+            size_bytes.assert_not_called()
+        cache.close()
+
+        cache = DiskCache(self.directory, max_bytes=250)
+        assert cache.size_bytes() == 200
+        cache.close()
+
+
+class TestHTTPResolverDiskCache(TestCase):
+    def test_cold_start_is_served_from_disk(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60"}, b"<p>cached</p>")}
+        with tempfile.TemporaryDirectory() as directory:
+            with LocalServer(routes) as server:
+                url = URL(server.url("/"))
+                pool = ConnectionPool()
+                disk_cache = DiskCache(directory)
+                assert (
+                    HTTPResolver(url, BrowserCache(), pool, disk_cache).resolve()
+                    == "<p>cached</p>"
+                )
+                disk_cache.close()
+                pool.close()
+
+                # A new session with an empty memory cache
+                memory_cache = BrowserCache()
+                disk_cache = DiskCache(directory)
+                resolver = HTTPResolver(url, memory_cache, pool, disk_cache)
+                assert resolver.resolve() == "<p>cached</p>"
+                assert len(server.requests) == 1
+                assert memory_cache.get(str(url)).body == "<p>cached</p>"
+                disk_cache.close()
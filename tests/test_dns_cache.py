@@ -0,0 +1,77 @@
+import socket
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from src.networking import http_client
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.dns_cache import DNSCache
+from src.networking.tls import TLSSessionCache, shared_ssl_context
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+ADDRESS = (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 80))
+
+
+class TestDNSCache(TestCase):
+    @patch("socket.getaddrinfo", return_value=[ADDRESS])
+    def test_lookups_are_cached(self, getaddrinfo: Mock):
+        cache = DNSCache()
+        assert cache.resolve("example.com", 80) == [ADDRESS]
+        assert cache.resolve("example.com", 80) == [ADDRESS]
+        assert getaddrinfo.call_count == 1
+        cache.resolve("example.com", 443)
+        assert getaddrinfo.call_count == 2
+
+    @patch("socket.getaddrinfo", return_value=[ADDRESS])
+    def test_entries_expire(self, getaddrinfo: Mock):
+        cache = DNSCache(ttl=0)
+        cache.resolve("example.com", 80)
+        cache.resolve("example.com", 80)
+        assert getaddrinfo.call_count == 2
+
+    @patch("socket.getaddrinfo", side_effect=socket.gaierror("no such host"))
+    def test_failures_are_not_cached(self, getaddrinfo: Mock):
+        cache = DNSCache()
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror):
+                cache.resolve("missing.invalid", 80)
+        assert getaddrinfo.call_count == 2
+        assert cache.entries == {}
+
+    @patch("socket.getaddrinfo", return_value=[ADDRESS])
+    def test_oldest_entry_is_dropped_when_full(self, _: Mock):
+        cache = DNSCache(max_entries=2)
+        cache.resolve("a.example", 80)
+        cache.resolve("b.example", 80)
+        cache.resolve("c.example", 80)
+        assert list(cache.entries) == [("b.example", 80), ("c.example", 80)]
+
+    def test_client_connections_use_the_cache(self):
+        http_client.DNS_CACHE.clear()
+        routes = {"/": (200, {"Connection": "close"}, b"ok")}
+        with LocalServer(routes) as server:
+            url = URL(server.url("/"))
+            pool = ConnectionPool()
+            with patch("socket.getaddrinfo", wraps=socket.getaddrinfo) as lookup:
+                for _ in range(3):
+                    assert HTTPResolver(url, BrowserCache(), pool).resolve() == "ok"
+            assert server.connections == 3
+            assert lookup.call_count == 1
+            pool.close()
+
+
+class TestTLSSessionCache(TestCase):
+    def test_sessions_are_stored_per_host(self):
+        sessions = TLSSessionCache()
+        session = Mock()
+        sessions.set("example.com", 443, session)
+        sessions.set("example.com", 8443, None)
+        assert sessions.get("example.com", 443) is session
+        assert sessions.get("example.com", 8443) is None
+        sessions.remove("example.com", 443)
+        assert sessions.get("example.com", 443) is None
+
+    def test_ssl_context_is_shared(self):
+        assert shared_ssl_context() is shared_ssl_context()
@@ -0,0 +1,151 @@
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from src.networking.happy_eyeballs import connect, interleave_families
+from src.networking.headers import Headers
+from src.networking.http_client import HTTPClient, RequestTimeout
+from src.networking.request import Request
+from src.utils.url import URL
+
+
+def address(family: socket.AddressFamily, host: str, port: int):
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (host, port))
+
+
+class Listeners:
+    """Local listening sockets, closed together at the end of a test."""
+
+    def __init__(self):
+        self.sockets = []
+
+    def listen(self, backlog: int = 8) -> int:
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(backlog)
+        self.sockets.append(listener)
+        return listener.getsockname()[1]
+
+    def stalled(self) -> int:
+        """A port whose accept queue is full, so new connects never complete."""
+        port = self.listen(0)
+        filler = socket.create_connection(("127.0.0.1", port))
+        self.sockets.append(filler)
+        return port
+
+    def serve_once(self, response: bytes) -> int:
+        """A port that sends `response` to one client and then goes silent."""
+        port = self.listen()
+        listener = self.sockets[-1]
+
+        def serve():
+            conn, _ = listener.accept()
+            self.sockets.append(conn)
+            conn.recv(65536)
+            conn.sendall(response)
+
+        threading.Thread(target=serve, daemon=True).start()
+        return port
+
+    def close(self):
+        for s in self.sockets:
+            s.close()
+
+
+class TestHappyEyeballs(TestCase):
+    def setUp(self):
+        self.listeners = Listeners()
+
+    def tearDown(self):
+        self.listeners.close()
+
+    def test_interleave_families(self):
+        v6 = [address(socket.AF_INET6, "::1", port) for port in (1, 2, 3)]
+        v4 = [address(socket.AF_INET, "127.0.0.1", port) for port in (4, 5)]
+        assert interleave_families(v6 + v4) == [v6[0], v4[0], v6[1], v4[1], v6[2]]
+        assert interleave_families(v4[:1] + v6[:2]) == [v4[0], v6[0], v6[1]]
+        assert interleave_families([]) == []
+
+    def test_stalled_address_is_raced(self):
+        stalled = self.listeners.stalled()
+        good = self.listeners.listen()
+        addresses = [
+            address(socket.AF_INET, "127.0.0.1", stalled),
+            address(socket.AF_INET, "127.0.0.1", good),
+        ]
+        start = time.monotonic()
+        s = connect(addresses, start + 5, attempt_delay=0.1)
+        elapsed = time.monotonic() - start
+        assert s.getpeername()[1] == good
+        assert 0.1 <= elapsed < 1
+        s.close()
+
+    def test_refused_address_falls_through_immediately(self):
+        refused = self.listeners.listen()
+        self.listeners.sockets.pop().close()
+        good = self.listeners.listen()
+        addresses = [
+            address(socket.AF_INET, "127.0.0.1", refused),
+            address(socket.AF_INET, "127.0.0.1", good),
+        ]
+        start = time.monotonic()
+        s = connect(addresses, start + 5, attempt_delay=1)
+        assert s.getpeername()[1] == good
+        assert time.monotonic() - start < 0.5
+        s.close()
+
+    def test_every_address_refused(self):
+        refused = self.listeners.listen()
+        self.listeners.sockets.pop().close()
+        with self.assertRaises(ConnectionRefusedError):
+            connect(
+                [address(socket.AF_INET, "127.0.0.1", refused)],
+                time.monotonic() + 5,
+            )
+
+    def test_deadline_while_connecting(self):
+        stalled = self.listeners.stalled()
+        start = time.monotonic()
+        with self.assertRaises(socket.timeout):
+            connect([address(socket.AF_INET, "127.0.0.1", stalled)], start + 0.2)
+        assert time.monotonic() - start < 1
+
+
+class TestRequestDeadline(TestCase):
+    def setUp(self):
+        self.listeners = Listeners()
+
+    def tearDown(self):
+        self.listeners.close()
+
+    def request(self, port: int, timeout: float) -> str:
+        url = URL(f"http://127.0.0.1:{port}/")
+        client = HTTPClient(url, timeout=timeout)
+        return client.send_request(Request(url, Headers.default(url.host))).body
+
+    def assert_times_out(self, port: int):
+        start = time.monotonic()
+        with self.assertRaises(RequestTimeout) as context:
+            self.request(port, timeout=0.3)
+        assert time.monotonic() - start < 1.5
+        assert "timed out after 0.3s" in str(context.exception)
+
+    def test_connect_timeout(self):
+        self.assert_times_out(self.listeners.stalled())
+
+    def test_no_response_timeout(self):
+        # Connects through the accept queue but is never served
+        self.assert_times_out(self.listeners.listen())
+
+    def test_stalled_body_timeout(self):
+        port = self.listeners.serve_once(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nab"
+        )
+        self.assert_times_out(port)
+
+    def test_completes_within_deadline(self):
+        port = self.listeners.serve_once(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+        )
+        assert self.request(port, timeout=5) == "ok"
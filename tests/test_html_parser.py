@@ -0,0 +1,321 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from src.parser.html_parser import HTMLParser
+from src.render.base_element import EMPTY_CHILDREN
+from src.render.element import Element
+from src.render.text import SourceText, Text
+
+
+def parse(document: str) -> Element:
+    resolver = Mock()
+    resolver.stream.return_value = iter([document])
+    return HTMLParser(resolver).lex().element
+
+
+def feed_in_chunks(document: str, size: int, lazy_text: bool = False) -> Element:
+    parser = HTMLParser(Mock(), lazy_text=lazy_text)
+    for idx in range(0, len(document), size):
+        parser.feed(document[idx : idx + size])
+    return parser.close().element
+
+
+def dump(node, indent: int = 0) -> list:
+    lines = [" " * indent + str(node)]
+    for child in node.children:
+        lines.extend(dump(child, indent + 1))
+    return lines
+
+
+def tags(node) -> list:
+    return [child.tag for child in node.children if isinstance(child, Element)]
+
+
+class TestHTMLParser(TestCase):
+    def test_implicit_html_head_body(self):
+        root = parse("<title>Hi</title><p>Body</p>")
+        assert root.tag == "html"
+        assert tags(root) == ["head", "body"]
+        head, body = root.children
+        assert tags(head) == ["title"]
+        assert tags(body) == ["p"]
+
+    def test_head_is_closed_implicitly(self):
+        root = parse("<meta charset=utf-8><link rel=icon><p>Body</p>")
+        head, body = root.children
+        assert tags(head) == ["meta", "link"]
+        assert tags(body) == ["p"]
+
+    def test_open_tags_track_unfinished_tags(self):
+        parser = HTMLParser(Mock())
+        parser.feed("<p><b>bold<i>italic</i>")
+        assert parser.open_tags == ["html", "body", "p", "b"]
+        assert parser.open_tags == [t.tag for t in parser.unfinished_tags]
+        parser.close()
+        assert parser.open_tags == []
+
+    def test_deep_nesting(self):
+        depth = 10000
+        root = parse("<div>" * depth + "</div>" * depth)
+        node = root.children[0]
+        for _ in range(depth):
+            assert node.tag in ("body", "div")
+            node = node.children[0]
+        assert node.children == []
+
+    def test_nodes_are_compact(self):
+        root = parse("<p>one</p><p>two</p>")
+        first, second = root.children[0].children
+        assert not hasattr(first, "__dict__")
+        assert first.tag is second.tag
+        assert first.children[0].children is EMPTY_CHILDREN
+
+    def test_text_is_stripped(self):
+        root = parse("<p>   Hello world  </p>")
+        body = root.children[0]
+        paragraph = body.children[0]
+        assert isinstance(paragraph.children[0], Text)
+        assert paragraph.children[0].text == "Hello world"
+
+    def test_comments_are_skipped(self):
+        root = parse("<body><!-- <p>hidden</p> --><p>shown</p><!----></body>")
+        body = root.children[0]
+        assert tags(body) == ["p"]
+        assert body.children[0].children[0].text == "shown"
+
+    def test_unterminated_comment_swallows_rest(self):
+        root = parse("<p>shown</p><!-- <p>hidden</p>")
+        body = root.children[0]
+        assert tags(body) == ["p"]
+
+    def test_trailing_text_is_text_node(self):
+        root = parse("<p>a</p>tail")
+        body = root.children[0]
+        assert isinstance(body.children[-1], Text)
+        assert body.children[-1].text == "tail"
+
+    def test_doctype_is_ignored(self):
+        root = parse("<!DOCTYPE html><html><body>x</body></html>")
+        assert root.tag == "html"
+        assert tags(root) == ["body"]
+
+    def test_self_closing_tags(self):
+        root = parse("<p>a<br>b</p>")
+        paragraph = root.children[0].children[0]
+        assert tags(paragraph) == ["br"]
+        assert [c.text for c in paragraph.children if isinstance(c, Text)] == [
+            "a",
+            "b",
+        ]
+
+
+class TestHTMLParserStreaming(TestCase):
+    DOCUMENT = (
+        "<!DOCTYPE html><html><head><title>Streaming &amp; chunks</title>"
+        '<meta name="author" content="me"></head><body>'
+        "<!-- a comment with <p>markup</p> -->"
+        "<p>First &lt;paragraph&gt; with <b>bold</b> text</p>"
+        "<p>Second<br>paragraph &mdash; done</p>"
+        "</body></html>"
+    )
+
+    def test_chunked_feed_matches_single_parse(self):
+        expected = dump(parse(self.DOCUMENT))
+        for size in range(1, len(self.DOCUMENT) + 1):
+            assert dump(feed_in_chunks(self.DOCUMENT, size)) == expected, size
+
+    def test_text_is_not_split_across_chunks(self):
+        root = feed_in_chunks("<p>Hello world</p>", 2)
+        paragraph = root.children[0].children[0]
+        assert [child.text for child in paragraph.children] == ["Hello world"]
+
+    def test_comment_prefix_split_across_chunks(self):
+        parser = HTMLParser(Mock())
+        parser.feed("<p>a</p><!")
+        parser.feed("-")
+        parser.feed("- <p>hidden> -")
+        parser.feed("-><p>b</p>")
+        body = parser.close().element.children[0]
+        assert tags(body) == ["p", "p"]
+
+    def test_held_back_input_is_not_rejoined_per_chunk(self):
+        parser = HTMLParser(Mock())
+        parser.feed("<p>a</p><!-- long")
+        for _ in range(100):
+            parser.feed(" comment")
+        parser.feed(' <p>hidden</p> --><p title="split')
+        for _ in range(100):
+            parser.feed(" value")
+        assert len(parser.pending) == 101
+        parser.feed('">b</p>')
+        assert parser.pending == []
+        body = parser.close().element.children[0]
+        assert tags(body) == ["p", "p"]
+        assert body.children[1].attributes.get_attribute("title").count("value") == 100
+
+    def test_dom_is_built_before_close(self):
+        parser = HTMLParser(Mock())
+        parser.feed("<html><body><p>first</p><p>sec")
+        html = parser.unfinished_tags[0]
+        body = parser.unfinished_tags[1]
+        assert html.tag == "html"
+        assert tags(body) == ["p"]
+
+    def test_snapshot_is_unaffected_by_later_input(self):
+        parser = HTMLParser(Mock())
+        assert parser.snapshot() is None
+        parser.feed("<html><body><p>first</p><p>sec")
+        snapshot = parser.snapshot()
+        body = snapshot.element.children[0]
+        assert tags(body) == ["p", "p"]
+        assert body.children[0].children[0].text == "first"
+
+        parser.feed("ond</p><p>third</p></body></html>")
+        assert tags(body) == ["p", "p"]
+        assert body.children[1].children == []
+        full = "<html><body><p>first</p><p>second</p><p>third</p></body></html>"
+        assert dump(parser.close().element) == dump(parse(full))
+
+
+class TestHTMLEntities(TestCase):
+    def paragraph_text(self, document: str) -> str:
+        return parse(document).children[0].children[0].children[0].text
+
+    def test_named_entities(self):
+        text = self.paragraph_text(
+            "<p>&lt;a&gt; &amp; &copy; &mdash; &eacute; &hellip;</p>"
+        )
+        assert text == "<a> & © — é …"
+
+    def test_numeric_entities(self):
+        assert self.paragraph_text("<p>&#65;&#x42;&#X43;&#8212;</p>") == "ABC—"
+
+    def test_unknown_entities_are_kept(self):
+        assert self.paragraph_text("<p>&bogus; & done</p>") == "&bogus; & done"
+
+    def test_entity_at_end_of_text(self):
+        assert self.paragraph_text("<p>fish &amp;</p>") == "fish &"
+
+    def test_escaped_markup_is_text(self):
+        root = parse("<p>&lt;b&gt;not bold&lt;/b&gt;</p>")
+        paragraph = root.children[0].children[0]
+        assert tags(paragraph) == []
+        assert paragraph.children[0].text == "<b>not bold</b>"
+
+    def test_attribute_values_are_decoded(self):
+        root = parse('<a href="/search?q=1&amp;page=2">x</a>')
+        anchor = root.children[0].children[0]
+        assert anchor.attributes.get_attribute("href") == "/search?q=1&page=2"
+
+
+class TestHTMLParserLazyText(TestCase):
+    DOCUMENT = (
+        "<html><body><p>  First &amp; foremost  </p>\n  \n"
+        "<p>Second <b>bold</b> tail&hellip;</p></body></html>"
+    )
+
+    def test_lazy_text_matches_copied_text(self):
+        expected = dump(feed_in_chunks(self.DOCUMENT, len(self.DOCUMENT)))
+        for size in (1, 7, len(self.DOCUMENT)):
+            lazy = feed_in_chunks(self.DOCUMENT, size, lazy_text=True)
+            assert dump(lazy) == expected, size
+
+    def test_lazy_text_nodes_reference_the_source(self):
+        root = feed_in_chunks(self.DOCUMENT, len(self.DOCUMENT), lazy_text=True)
+        paragraph = root.children[0].children[0]
+        node = paragraph.children[0]
+        assert isinstance(node, SourceText)
+        assert node.source is self.DOCUMENT
+        assert node.text == "First & foremost"
+
+
+class TestHTMLParserRawText(TestCase):
+    DOCUMENT = (
+        "<html><head><title>A &amp; B</title>"
+        "<script>if (a < b && c > d) { s = '<p>&amp;</p>'; }</script>"
+        "<style>p > b { color: red; }</style></head>"
+        "<body><textarea><b>&lt;</b></textarea><p>after</p></body></html>"
+    )
+
+    def texts(self, root: Element) -> dict:
+        head, body = root.children
+        return {
+            child.tag: child.children[0].text for child in head.children + body.children
+        }
+
+    def test_raw_text_elements_hold_a_single_text_node(self):
+        assert self.texts(parse(self.DOCUMENT)) == {
+            "title": "A & B",
+            "script": "if (a < b && c > d) { s = '<p>&amp;</p>'; }",
+            "style": "p > b { color: red; }",
+            "textarea": "<b><</b>",
+            "p": "after",
+        }
+
+    def test_end_tag_is_case_insensitive(self):
+        root = parse("<script>a < b</SCRIPT ><p>x</p>")
+        head, body = root.children
+        assert head.children[0].children[0].text == "a < b"
+        assert tags(body) == ["p"]
+
+    def test_raw_text_split_across_chunks(self):
+        expected = dump(parse(self.DOCUMENT))
+        for size in range(1, len(self.DOCUMENT) + 1):
+            assert dump(feed_in_chunks(self.DOCUMENT, size)) == expected, size
+
+    def test_raw_text_with_lazy_text(self):
+        root = feed_in_chunks(self.DOCUMENT, 5, lazy_text=True)
+        assert self.texts(root) == self.texts(parse(self.DOCUMENT))
+
+    def test_raw_text_body_is_held_back_until_its_end_tag(self):
+        parser = HTMLParser(Mock())
+        parser.feed("<script>var s = '")
+        for _ in range(100):
+            parser.feed("<p>x</p>")
+        parser.feed("';</scr")
+        assert len(parser.pending) == 102
+        parser.feed("ipt><p>after</p>")
+        assert parser.pending == []
+        head, body = parser.close().element.children
+        assert head.children[0].children[0].text.count("<p>x</p>") == 100
+        assert tags(body) == ["p"]
+
+    def test_unterminated_raw_text_runs_to_end(self):
+        root = parse("<script>if (a < b) {")
+        head = root.children[0]
+        assert head.children[0].children[0].text == "if (a < b) {"
+
+
+class TestHTMLParserAttributes(TestCase):
+    def first_element(self, document: str) -> Element:
+        return parse(document).children[0].children[0]
+
+    def test_quoted_unquoted_and_valueless_attributes(self):
+        element = self.first_element(
+            """<input type=checkbox name = "a b" value='c "d"' checked>"""
+        )
+        assert element.tag == "input"
+        assert element.attributes.attributes == {
+            "type": "checkbox",
+            "name": "a b",
+            "value": 'c "d"',
+            "checked": "",
+        }
+
+    def test_names_are_lowercased_and_first_duplicate_wins(self):
+        element = self.first_element('<div ID="one" id="two" Class=x>')
+        assert element.attributes.attributes == {"id": "one", "class": "x"}
+
+    def test_self_closing_slash(self):
+        root = parse('<p>a<br/>b<img src="x.png" /></p>')
+        paragraph = root.children[0].children[0]
+        assert tags(paragraph) == ["br", "img"]
+        assert paragraph.children[3].attributes.get_attribute("src") == "x.png"
+
+    def test_names_and_common_values_are_interned(self):
+        root = parse('<p class="lead">a</p><p class="lead">b</p>')
+        first, second = root.children[0].children
+        ((first_key, first_value),) = first.attributes.attributes.items()
+        ((second_key, second_value),) = second.attributes.attributes.items()
+        assert first_key is second_key
+        assert first_value is second_value
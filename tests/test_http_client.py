@@ -0,0 +1,249 @@
+import gzip
+import time
+from unittest import TestCase
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.headers import Headers
+from src.networking.http_client import HTTPClient, RequestTimeout
+from src.networking.request import Request
+from src.networking.response_reader import READ_CHUNK_SIZE
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+BODY = "<html><body>" + "héllo wörld " * 2000 + "</body></html>"
+
+
+def fetch(url: str, pool: ConnectionPool) -> str:
+    return HTTPResolver(URL(url), BrowserCache(), pool).resolve()
+
+
+class TestHTTPClient(TestCase):
+    def test_keep_alive_reuses_connection(self):
+        routes = {"/a": (200, {}, BODY.encode()), "/b": (200, {}, b"b")}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/a"), pool) == BODY
+            assert fetch(server.url("/b"), pool) == "b"
+            assert fetch(server.url("/a"), pool) == BODY
+            assert server.connections == 1
+            assert pool.size() == 1
+            pool.close()
+
+    def test_request_is_http_11_keep_alive(self):
+        with LocalServer({"/": (200, {}, b"ok")}) as server:
+            pool = ConnectionPool()
+            fetch(server.url("/"), pool)
+            _, headers = server.requests[0]
+            assert headers["connection"] == "keep-alive"
+            pool.close()
+
+    def test_chunked_body(self):
+        routes = {"/": (200, {"Transfer-Encoding": "chunked"}, BODY.encode())}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/"), pool) == BODY
+            assert fetch(server.url("/"), pool) == BODY
+            assert server.connections == 1
+            pool.close()
+
+    def test_connection_close_is_not_pooled(self):
+        routes = {"/": (200, {"Connection": "close"}, b"closing")}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/"), pool) == "closing"
+            assert pool.size() == 0
+            assert fetch(server.url("/"), pool) == "closing"
+            assert server.connections == 2
+
+    def test_slow_consumer_does_not_use_up_the_deadline(self):
+        body = b"x" * (READ_CHUNK_SIZE * 12)
+        with LocalServer({"/": (200, {}, body)}) as server:
+            url = URL(server.url("/"))
+            client = HTTPClient(url, timeout=0.3)
+            client.start_request(Request(url, headers=Headers.default(url.host)))
+            received = 0
+            for chunk in client.iter_body():
+                received += len(chunk)
+                time.sleep(0.05)
+            assert received == len(body)
+
+    def test_stalled_body_times_out(self):
+        routes = {"/": (200, {"Content-Length": "10"}, b"short")}
+        with LocalServer(routes) as server:
+            url = URL(server.url("/"))
+            client = HTTPClient(url, timeout=0.3)
+            client.start_request(Request(url, headers=Headers.default(url.host)))
+            with self.assertRaises(RequestTimeout):
+                for _ in client.iter_body():
+                    pass
+
+    def test_redirect_reuses_connection(self):
+        routes = {
+            "/old": (301, {"Location": "/new"}, b"moved"),
+            "/new": (200, {}, b"new"),
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            url = URL(server.url("/old"))
+            client = HTTPClient(url, pool=pool)
+            response = client.send_request(Request(url, Headers.default(url.host)))
+            assert response.status_code == 200
+            assert response.body == "new"
+            assert server.connections == 1
+            pool.close()
+
+    def test_relative_redirect_location(self):
+        routes = {
+            "/docs/old": (302, {"Location": "new?page=2"}, b""),
+            "/docs/new?page=2": (200, {}, b"moved"),
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/docs/old"), pool) == "moved"
+            pool.close()
+
+    def test_body_is_decoded_with_response_charset(self):
+        body = "caf\xe9 cr\xe8me"
+        routes = {
+            "/": (
+                200,
+                {"Content-Type": "text/html; charset=iso-8859-1"},
+                body.encode("iso-8859-1"),
+            )
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/"), pool) == body
+            url = URL(server.url("/"))
+            client = HTTPClient(url, pool=pool)
+            response = client.send_request(Request(url, Headers.default(url.host)))
+            assert response.body == body
+            pool.close()
+
+    def test_gzip_body_is_decompressed(self):
+        compressed = gzip.compress(BODY.encode())
+        routes = {
+            "/": (200, {"Content-Encoding": "gzip"}, compressed),
+            "/chunked": (
+                200,
+                {"Content-Encoding": "gzip", "Transfer-Encoding": "chunked"},
+                compressed,
+            ),
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            assert fetch(server.url("/"), pool) == BODY
+            assert fetch(server.url("/chunked"), pool) == BODY
+            _, headers = server.requests[0]
+            assert headers["accept-encoding"] == "gzip, deflate"
+            pool.close()
+
+    def test_stale_entry_is_revalidated_with_304(self):
+        routes = {
+            "/": (
+                200,
+                {
+                    "Cache-Control": "max-age=0",
+                    "ETag": '"v1"',
+                    "Last-Modified": "Tue, 01 Aug 2023 00:00:00 GMT",
+                },
+                BODY.encode(),
+            )
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            assert HTTPResolver(url, cache, pool).resolve() == BODY
+
+            routes["/"] = (304, {"Cache-Control": "max-age=60"}, b"")
+            assert HTTPResolver(url, cache, pool).resolve() == BODY
+            _, headers = server.requests[1]
+            assert headers["if-none-match"] == '"v1"'
+            assert headers["if-modified-since"] == "Tue, 01 Aug 2023 00:00:00 GMT"
+
+            # The 304 refreshed the entry, so this is served from memory
+            assert HTTPResolver(url, cache, pool).resolve() == BODY
+            assert len(server.requests) == 2
+            assert server.connections == 1
+            pool.close()
+
+    def test_changed_resource_replaces_stale_entry(self):
+        routes = {"/": (200, {"ETag": '"v1"'}, b"old")}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            assert HTTPResolver(url, cache, pool).resolve() == "old"
+
+            routes["/"] = (200, {"ETag": '"v2"'}, b"new")
+            assert HTTPResolver(url, cache, pool).resolve() == "new"
+            _, headers = server.requests[1]
+            assert headers["if-none-match"] == '"v1"'
+            assert (
+                cache.get_stale(str(url))["value"].headers.get_header("etag") == '"v2"'
+            )
+            pool.close()
+
+    def test_cache_control_with_several_directives(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60, public"}, b"ok")}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            assert HTTPResolver(url, cache, pool).resolve() == "ok"
+            assert HTTPResolver(url, cache, pool).resolve() == "ok"
+            assert len(server.requests) == 1
+            pool.close()
+
+    def test_no_store_is_not_cached(self):
+        routes = {"/": (200, {"Cache-Control": "private, no-store"}, b"ok")}
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            HTTPResolver(url, cache, pool).resolve()
+            assert cache.get_stale(str(url)) is None
+            pool.close()
+
+    def test_stale_while_revalidate_refreshes_in_background(self):
+        routes = {
+            "/": (200, {"Cache-Control": "max-age=0, stale-while-revalidate=60"}, b"v1")
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            assert HTTPResolver(url, cache, pool).resolve() == "v1"
+
+            routes["/"] = (200, {"Cache-Control": "max-age=60"}, b"v2")
+            # Served stale at once while the refresh runs on another thread
+            assert HTTPResolver(url, cache, pool).resolve() == "v1"
+            for _ in range(100):
+                if cache.get(str(url)):
+                    break
+                time.sleep(0.01)
+            assert HTTPResolver(url, cache, pool).resolve() == "v2"
+            assert len(server.requests) == 2
+            pool.close()
+
+    def test_must_revalidate_is_not_served_stale(self):
+        routes = {
+            "/": (
+                200,
+                {
+                    "Cache-Control": "max-age=0, must-revalidate, stale-while-revalidate=60"
+                },
+                b"v1",
+            )
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            url = URL(server.url("/"))
+            HTTPResolver(url, cache, pool).resolve()
+            routes["/"] = (200, {}, b"v2")
+            assert HTTPResolver(url, cache, pool).resolve() == "v2"
+            pool.close()
@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from src.parser.html_parser import HTMLParser
+from src.render.layout import BlockLayout
+from src.render.settings import Settings
+from tests.fake_tk import FakeFont
+
+DOCUMENT = (
+    "<html><body>"
+    + (
+        "<p>Some <b>bold</b> and <i>italic</i> words<br>after a break</p>"
+        "<p><big>Big</big> then <small>small</small> text</p>" * 30
+    )
+    + "</body></html>"
+)
+
+
+class TestBlockLayoutUntil(TestCase):
+    def setUp(self):
+        patcher = patch("tkinter.font.Font", FakeFont)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.settings = Settings()
+
+    def block(self) -> BlockLayout:
+        parser = HTMLParser(Mock())
+        parser.feed(DOCUMENT)
+        return BlockLayout(parser.close(), None, None, self.settings)
+
+    def full_layout(self) -> list:
+        block = self.block()
+        block.layout()
+        return block.display_list
+
+    def test_layout_in_steps_matches_one_layout(self):
+        expected = self.full_layout()
+        by_height = self.block()
+        y = 0
+        while not by_height.layout_until(y):
+            y += 50
+        by_nodes = self.block()
+        while not by_nodes.layout_until(max_nodes=7):
+            pass
+        assert by_height.display_list == expected
+        assert by_nodes.display_list == expected
+
+    def test_second_call_continues_where_the_first_stopped(self):
+        block = self.block()
+        with patch.object(block, "layout_text", wraps=block.layout_text) as text:
+            assert not block.layout_until(200)
+            assert block.cursor_y > 200
+            first_lines = list(block.display_list)
+            first_texts = text.call_count
+            assert block.layout_until()
+            texts = text.call_count
+        full = self.block()
+        with patch.object(full, "layout_text", wraps=full.layout_text) as text:
+            full.layout()
+            full_texts = text.call_count
+        assert 0 < first_texts < texts == full_texts
+        assert block.display_list[: len(first_lines)] == first_lines
+        assert block.display_list == full.display_list
+
+    def test_finished_layout_flushes_once(self):
+        block = self.block()
+        with patch.object(block, "flush", wraps=block.flush) as flush:
+            while not block.layout_until(max_nodes=50):
+                pass
+            flushes = flush.call_count
+            assert block.finished
+            assert block.layout_until()
+            assert block.layout_until(0, 1)
+            assert flush.call_count == flushes
+        assert block.display_list == self.full_layout()
+        assert block.display_list[-1][0] == "text"
@@ -0,0 +1,119 @@
+from typing import List
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from src.parser.html_parser import HTMLParser
+from src.render.document_layout import DocumentLayout
+from src.render.html_element import HTMLElement
+from src.render.page_cache import CachedPage, PageCache
+from src.render.settings import Settings
+from tests.fake_tk import FakeFont
+
+DOCUMENT = "<html><body><p>Hello <b>world</b></p></body></html>"
+
+
+class CountingLayout:
+    def __init__(self):
+        self.calls = 0
+        with patch("tkinter.font.Font", FakeFont):
+            self.settings = Settings()
+
+    def __call__(self, nodes: HTMLElement) -> DocumentLayout:
+        self.calls += 1
+        document = DocumentLayout(nodes, self.settings)
+        document.display_list = [("Hello", 13, 18, None), ("world", 60, 18, None)]
+        return document
+
+
+def load(
+    cache: PageCache, chunks: List[str], layout, layout_key=(800, 16)
+) -> CachedPage:
+    parsed = cache.parse(iter(chunks), HTMLParser(Mock()), layout_key)
+    if parsed["page"] is not None:
+        return parsed["page"]
+    return cache.set(parsed["key"], layout(parsed["nodes"]), parsed["tree_size"])
+
+
+class TestPageCache(TestCase):
+    def test_single_chunk_reload_skips_parse_and_layout(self):
+        cache = PageCache()
+        layout = CountingLayout()
+        first = load(cache, [DOCUMENT], layout)
+        second = load(cache, [DOCUMENT], layout)
+        assert layout.calls == 1
+        assert second["nodes"] is first["nodes"]
+        assert second["document"] is first["document"]
+
+    def test_streamed_body_is_cached_for_the_next_load(self):
+        cache = PageCache()
+        layout = CountingLayout()
+        chunks = [DOCUMENT[:10], DOCUMENT[10:30], DOCUMENT[30:]]
+        first = load(cache, chunks, layout)
+        assert first["nodes"].element.tag == "html"
+        second = load(cache, [DOCUMENT], layout)
+        assert layout.calls == 1
+        assert second["nodes"] is first["nodes"]
+
+    def test_layout_settings_are_part_of_the_key(self):
+        cache = PageCache()
+        layout = CountingLayout()
+        load(cache, [DOCUMENT], layout, layout_key=(800, 16))
+        load(cache, [DOCUMENT], layout, layout_key=(600, 16))
+        load(cache, [DOCUMENT + " "], layout, layout_key=(800, 16))
+        assert layout.calls == 3
+        assert cache.get_capacity() == 3
+
+    def test_evicts_least_recently_used_by_estimated_size(self):
+        layout = CountingLayout()
+        page_size = load(PageCache(), ["<p>a</p>"], layout)["size"]
+        cache = PageCache(max_bytes=page_size * 2)
+        load(cache, ["<p>a</p>"], layout)
+        load(cache, ["<p>b</p>"], layout)
+        load(cache, ["<p>a</p>"], layout)
+        load(cache, ["<p>c</p>"], layout)
+        assert cache.get_capacity() == 2
+        assert cache.size_bytes <= page_size * 2
+
+        calls = layout.calls
+        load(cache, ["<p>a</p>"], layout)
+        assert layout.calls == calls
+        load(cache, ["<p>b</p>"], layout)
+        assert layout.calls == calls + 1
+
+    def test_oversized_page_is_not_cached(self):
+        cache = PageCache(max_bytes=10)
+        layout = CountingLayout()
+        page = load(cache, [DOCUMENT], layout)
+        assert page["document"].display_list[0][0] == "Hello"
+        assert cache.get_capacity() == 0
+
+    def test_parse_leaves_layout_of_a_miss_to_the_caller(self):
+        cache = PageCache()
+        parsed = cache.parse(iter([DOCUMENT]), HTMLParser(Mock()), (800, 16))
+        assert parsed["page"] is None
+        assert parsed["nodes"].element.tag == "html"
+        assert cache.get_capacity() == 0
+
+        document = CountingLayout()(parsed["nodes"])
+        page = cache.set(parsed["key"], document, parsed["tree_size"])
+        hit = cache.parse(iter([DOCUMENT]), HTMLParser(Mock()), (800, 16))
+        assert hit["page"] is page
+
+    def test_set_returns_the_new_page_when_evicting(self):
+        layout = CountingLayout()
+        page_size = load(PageCache(), ["<p>a</p>"], layout)["size"]
+        cache = PageCache(max_bytes=page_size)
+        load(cache, ["<p>a</p>"], layout)
+        page = load(cache, ["<p>b</p>"], layout)
+        assert page["nodes"].element.children[0].children[0].children[0].text == "b"
+
+    def test_update_size_counts_layout_added_after_storing(self):
+        cache = PageCache()
+        parsed = cache.parse(iter([DOCUMENT]), HTMLParser(Mock()), (800, 16))
+        document = CountingLayout()(parsed["nodes"])
+        page = cache.set(parsed["key"], document, parsed["tree_size"])
+        size = page["size"]
+        document.display_list.extend([("more", 30, 40, None)] * 100)
+        cache.update_size(parsed["key"])
+        assert page["size"] > size
+        assert cache.size_bytes == page["size"]
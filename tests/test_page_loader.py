@@ -0,0 +1,78 @@
+import threading
+import time
+from unittest import TestCase
+
+from src.render.page_loader import LoadCancelled, PageLoad, PageLoader
+from src.utils.url import URL
+
+
+def wait_for(loader: PageLoader, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        load = loader.poll()
+        if load is not None:
+            return load
+        time.sleep(0.01)
+    raise AssertionError("load did not finish")
+
+
+class TestPageLoader(TestCase):
+    def test_result_is_handed_back_through_poll(self):
+        loader = PageLoader(
+            lambda load: {"key": None, "page": None, "nodes": str(load.url)}
+        )
+        load = loader.start(URL("http://example.com/"))
+        assert wait_for(loader) is load
+        assert load.parsed["nodes"] == "http://example.com:80/"
+        assert not loader.is_loading()
+        assert loader.poll() is None
+
+    def test_errors_are_handed_back(self):
+        def work(_: PageLoad):
+            raise ValueError("bad page")
+
+        loader = PageLoader(work)
+        loader.start(URL("http://example.com/"))
+        assert isinstance(wait_for(loader).error, ValueError)
+
+    def test_new_navigation_cancels_the_previous_load(self):
+        release = threading.Event()
+        cancelled = []
+
+        def work(load: PageLoad):
+            if load.url.path == "/slow":
+                release.wait(5)
+                try:
+                    load.check()
+                except LoadCancelled:
+                    cancelled.append(load.url.path)
+                    raise
+            return {"key": None, "page": None, "nodes": load.url.path}
+
+        loader = PageLoader(work)
+        slow = loader.start(URL("http://example.com/slow"))
+        fast = loader.start(URL("http://example.com/fast"))
+        assert slow.cancelled.is_set()
+        assert wait_for(loader) is fast
+        release.set()
+        time.sleep(0.1)
+        assert cancelled == ["/slow"]
+        assert loader.poll() is None
+
+    def test_guard_stops_and_closes_the_stream(self):
+        closed = []
+
+        def stream():
+            try:
+                yield "one"
+                yield "two"
+            finally:
+                closed.append(True)
+
+        load = PageLoad(URL("http://example.com/"))
+        chunks = load.guard(stream())
+        assert next(chunks) == "one"
+        load.cancel()
+        with self.assertRaises(LoadCancelled):
+            next(chunks)
+        assert closed == [True]
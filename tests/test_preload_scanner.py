@@ -0,0 +1,111 @@
+from unittest import TestCase
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.parser.preload_scanner import Preloader, PreloadKind, PreloadScanner
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+PAGE = """<html><head>
+<link rel="preconnect" href="https://fonts.example.com">
+<link rel=dns-prefetch href="//cdn.example.com/">
+<link rel="stylesheet" href="style.css">
+<script src="/app.js"></script>
+<script>document.write('<img src="written.png">')</script>
+<!-- <img src="commented.png"> -->
+</head><body><img src='../logo.png'><img src="data:image/png;base64,AA=="></body>
+</html>"""
+
+
+def scan(scanner: PreloadScanner, document: str):
+    return [(kind, str(url)) for kind, url in scanner.feed(document)]
+
+
+class TestPreloadScanner(TestCase):
+    def test_finds_hints_and_subresources(self):
+        scanner = PreloadScanner(URL("http://example.com/docs/index.html"))
+        assert scan(scanner, PAGE) == [
+            (PreloadKind.Preconnect, "https://fonts.example.com:443/"),
+            (PreloadKind.DNSPrefetch, "http://cdn.example.com:80/"),
+            (PreloadKind.Fetch, "http://example.com:80/docs/style.css"),
+            (PreloadKind.Fetch, "http://example.com:80/app.js"),
+            (PreloadKind.Fetch, "http://example.com:80/logo.png"),
+        ]
+
+    def test_tags_split_across_chunks(self):
+        scanner = PreloadScanner(URL("http://example.com/"))
+        preloads = []
+        for idx in range(0, len(PAGE), 7):
+            preloads.extend(scan(scanner, PAGE[idx : idx + 7]))
+        assert preloads == scan(PreloadScanner(URL("http://example.com/")), PAGE)
+
+    def test_base_and_duplicates(self):
+        scanner = PreloadScanner(URL("http://example.com/"))
+        preloads = scan(
+            scanner,
+            '<base href="http://static.example.com/v2/">'
+            '<img src="a.png"><img src="a.png"><link rel=preload href=a.png>',
+        )
+        assert preloads == [
+            (PreloadKind.Fetch, "http://static.example.com:80/v2/a.png")
+        ]
+
+    def test_raw_text_bodies_are_skipped(self):
+        scanner = PreloadScanner(URL("http://example.com/"))
+        preloads = scan(
+            scanner,
+            "<textarea><img src=x.png></textarea>"
+            "<style>/* <link rel=preload href=y.css> */</style>"
+            "<title><img src=t.png></TITLE><img src=z.png>",
+        )
+        assert preloads == [(PreloadKind.Fetch, "http://example.com:80/z.png")]
+
+
+class TestPreloader(TestCase):
+    def test_held_back_input_is_not_rejoined_per_chunk(self):
+        scanner = PreloadScanner(URL("http://example.com/"))
+        assert scan(scanner, '<p>a</p><img src="data:image/png;base64,') == []
+        for _ in range(100):
+            assert scan(scanner, "AAAA") == []
+        assert len(scanner.pending) == 101
+        assert scan(scanner, '"><!-- <img src=hidden.png>') == []
+        for _ in range(100):
+            assert scan(scanner, " comment") == []
+        assert len(scanner.pending) == 101
+        assert scan(scanner, ' --><img src="shown.png">') == [
+            (PreloadKind.Fetch, "http://example.com:80/shown.png")
+        ]
+        assert scanner.pending == []
+
+    def test_fetches_into_cache_and_preconnects(self):
+        routes = {
+            "/": (200, {}, b""),
+            "/style.css": (200, {"Cache-Control": "max-age=60"}, b"body {}"),
+        }
+        with LocalServer(routes) as server:
+            cache = BrowserCache()
+            pool = ConnectionPool()
+            preloader = Preloader(cache, pool)
+            page = (
+                f'<link rel=preconnect href="{server.url("/")}">'
+                '<link rel="stylesheet" href="/style.css">'
+            )
+            scanner = PreloadScanner(URL(server.url("/")))
+            for future in [preloader.start(p) for p in scanner.feed(page)]:
+                future.result()
+            preloader.close()
+
+            assert cache.get_capacity() == 1
+            assert [path for path, _ in server.requests] == ["/style.css"]
+            url = URL(server.url("/style.css"))
+            assert HTTPResolver(url, cache, pool).resolve() == "body {}"
+            assert len(server.requests) == 1
+            pool.close()
+
+    def test_scan_passes_chunks_through(self):
+        preloader = Preloader(BrowserCache(), ConnectionPool())
+        preloader.close()
+        chunks = ["<p>one", "</p><img src=x.png>"]
+        scanned = preloader.scan(iter(chunks), URL("http://example.com/"))
+        assert list(scanned) == chunks
@@ -0,0 +1,110 @@
+from unittest import TestCase
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.headers import Headers
+from src.networking.redirect_cache import RedirectCache
+from src.networking.response import Response
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+
+def redirect(status: int, headers: dict = None) -> Response:
+    return Response(status, "Moved", Headers(headers or {}), "")
+
+
+class TestRedirectCache(TestCase):
+    def test_permanent_redirects_are_cached(self):
+        cache = RedirectCache()
+        for status in (301, 308):
+            source = URL(f"http://example.com/{status}")
+            cache.add_redirect(source, URL("http://example.com/new"), redirect(status))
+            assert str(cache.resolve(source)) == "http://example.com:80/new"
+
+    def test_temporary_and_uncacheable_redirects_are_not(self):
+        cache = RedirectCache()
+        source = URL("http://example.com/old")
+        target = URL("http://example.com/new")
+        cache.add_redirect(source, target, redirect(302))
+        cache.add_redirect(source, target, redirect(307))
+        cache.add_redirect(source, target, redirect(301, {"cache-control": "no-store"}))
+        cache.add_redirect(
+            source, target, redirect(301, {"cache-control": "max-age=0"})
+        )
+        assert cache.resolve(source) is source
+
+    def test_chains_are_followed_and_loops_stopped(self):
+        cache = RedirectCache()
+        a, b, c = (URL(f"http://example.com/{name}") for name in "abc")
+        cache.add_redirect(a, b, redirect(301))
+        cache.add_redirect(b, c, redirect(308))
+        assert str(cache.resolve(a)) == str(c)
+        cache.add_redirect(c, a, redirect(301))
+        # A cached loop stops instead of spinning
+        assert str(cache.resolve(a)) in {str(a), str(b), str(c)}
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = RedirectCache(max_entries=2)
+        target = URL("http://example.com/new")
+        for name in "abc":
+            cache.add_redirect(URL(f"http://example.com/{name}"), target, redirect(301))
+        assert list(cache.redirects) == [
+            "http://example.com:80/b",
+            "http://example.com:80/c",
+        ]
+
+    def test_hsts_upgrade(self):
+        cache = RedirectCache()
+        cache.add_hsts(URL("https://example.com/"), "max-age=3600; includeSubDomains")
+        upgraded = cache.resolve(URL("http://example.com/page"))
+        assert str(upgraded) == "https://example.com:443/page"
+        assert str(cache.upgrade(URL("http://docs.example.com:8080/"))) == (
+            "https://docs.example.com:8080/"
+        )
+        assert str(cache.upgrade(URL("http://other.com/"))) == "http://other.com:80/"
+
+        cache.add_hsts(URL("https://example.com/"), "max-age=0")
+        assert (
+            str(cache.upgrade(URL("http://example.com/"))) == "http://example.com:80/"
+        )
+
+    def test_hsts_only_over_https_and_for_names(self):
+        cache = RedirectCache()
+        cache.add_hsts(URL("http://example.com/"), "max-age=3600")
+        cache.add_hsts(URL("https://127.0.0.1/"), "max-age=3600")
+        cache.add_hsts(URL("https://nosub.com/"), "max-age=3600")
+        assert cache.hsts_hosts.keys() == {"nosub.com"}
+        assert (
+            str(cache.upgrade(URL("http://a.nosub.com/"))) == "http://a.nosub.com:80/"
+        )
+
+
+class TestHTTPResolverRedirects(TestCase):
+    def test_permanent_redirect_is_skipped_on_later_loads(self):
+        routes = {
+            "/old": (301, {"Location": "/middle"}, b"moved"),
+            "/middle": (308, {"Location": "/new"}, b"moved"),
+            "/new": (200, {}, b"new"),
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            url = URL(server.url("/old"))
+            assert HTTPResolver(url, BrowserCache(), pool).resolve() == "new"
+            assert HTTPResolver(url, BrowserCache(), pool).resolve() == "new"
+            paths = [path for path, _ in server.requests]
+            assert paths == ["/old", "/middle", "/new", "/new"]
+            pool.close()
+
+    def test_temporary_redirect_is_followed_every_time(self):
+        routes = {
+            "/old": (302, {"Location": "/new"}, b"moved"),
+            "/new": (200, {}, b"new"),
+        }
+        with LocalServer(routes) as server:
+            pool = ConnectionPool()
+            url = URL(server.url("/old"))
+            for _ in range(2):
+                assert HTTPResolver(url, BrowserCache(), pool).resolve() == "new"
+            assert len(server.requests) == 4
+            pool.close()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
@@ -25,3 +27,16 @@ class TestDataResolver(TestCase):
         data_url = DataURL("data:text/plain,Some%20sample%20text")
         resolver = DataResolver(data_url)
         assert resolver.resolve() == "Some sample text"
+
+
+class TestFileResolver(TestCase):
+    def test_file_resolver_stream_matches_resolve(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as f:
+            f.write("<p>chunk</p>" * 20000)
+        try:
+            resolver = FileResolver(FileURL(f"file://{f.name}"))
+            chunks = list(resolver.stream())
+            assert len(chunks) > 1
+            assert "".join(chunks) == resolver.resolve()
+        finally:
+            os.remove(f.name)
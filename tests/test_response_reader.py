@@ -0,0 +1,108 @@
+import gzip
+import zlib
+from io import BytesIO
+from unittest import TestCase
+
+from src.networking.response_reader import ResponseReader
+
+
+def reader_for(raw: bytes) -> ResponseReader:
+    return ResponseReader(BytesIO(raw))
+
+
+def encoded_response(encoding: str, body: bytes) -> bytes:
+    return (
+        b"HTTP/1.1 200 OK\r\nContent-Encoding: %s\r\nContent-Length: %d\r\n\r\n%s"
+        % (encoding.encode(), len(body), body)
+    )
+
+
+PAGE = b"<p>" + b"compressible text " * 5000 + b"</p>"
+
+
+class TestResponseReader(TestCase):
+    def test_content_length_stops_at_message_end(self):
+        reader = reader_for(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhelloHTTP/1.1 204 ..."
+        )
+        response = reader.read_response_head()
+        assert response.status_code == 200
+        assert response.reason_phrase == "OK"
+        assert b"".join(reader.iter_body(response)) == b"hello"
+        assert reader.complete
+
+    def test_chunked_body_with_extensions_and_trailers(self):
+        reader = reader_for(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;name=value\r\nhello\r\n"
+            b"6\r\n world\r\n"
+            b"0\r\nExpires: never\r\n\r\n"
+            b"next"
+        )
+        response = reader.read_response_head()
+        chunks = list(reader.iter_body(response, chunk_size=4))
+        assert b"".join(chunks) == b"hello world"
+        assert len(chunks) > 2
+        assert reader.complete
+        assert reader.file.read() == b"next"
+
+    def test_truncated_body_is_incomplete(self):
+        reader = reader_for(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nhello")
+        response = reader.read_response_head()
+        assert b"".join(reader.iter_body(response)) == b"hello"
+        assert not reader.complete
+
+    def test_body_without_length_runs_to_eof(self):
+        reader = reader_for(b"HTTP/1.0 200 OK\r\n\r\nuntil the end")
+        response = reader.read_response_head()
+        assert b"".join(reader.iter_body(response)) == b"until the end"
+        assert reader.version == "HTTP/1.0"
+        assert not reader.complete
+
+    def test_not_modified_has_no_body(self):
+        reader = reader_for(b"HTTP/1.1 304 Not Modified\r\nContent-Length: 10\r\n\r\n")
+        response = reader.read_response_head()
+        assert list(reader.iter_body(response)) == []
+        assert reader.complete
+
+    def test_charset_from_content_type(self):
+        reader = reader_for(
+            b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset="ISO-8859-1"\r\n\r\n'
+        )
+        assert reader.read_response_head().headers.encoding == "iso8859-1"
+
+    def test_unknown_charset_keeps_default(self):
+        reader = reader_for(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=bogus\r\n\r\n"
+        )
+        assert reader.read_response_head().headers.encoding == "utf8"
+
+
+class TestResponseReaderContentEncoding(TestCase):
+    def content(self, encoding: str, body: bytes, chunk_size: int = 8192) -> list:
+        reader = reader_for(encoded_response(encoding, body))
+        response = reader.read_response_head()
+        return list(reader.iter_content(response, chunk_size))
+
+    def test_gzip(self):
+        assert b"".join(self.content("gzip", gzip.compress(PAGE))) == PAGE
+
+    def test_deflate(self):
+        assert b"".join(self.content("deflate", zlib.compress(PAGE))) == PAGE
+
+    def test_raw_deflate(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        raw = compressor.compress(PAGE) + compressor.flush()
+        assert b"".join(self.content("deflate", raw)) == PAGE
+
+    def test_identity(self):
+        assert b"".join(self.content("identity", PAGE)) == PAGE
+
+    def test_inflated_chunks_are_bounded(self):
+        chunks = self.content("gzip", gzip.compress(PAGE), chunk_size=1024)
+        assert b"".join(chunks) == PAGE
+        assert max(len(chunk) for chunk in chunks) <= 1024
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(ValueError):
+            self.content("br", PAGE)
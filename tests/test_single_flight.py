@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from src.networking.cache import BrowserCache
+from src.networking.connection_pool import ConnectionPool
+from src.networking.single_flight import Abandoned, SingleFlight
+from src.resolver.http_resolver import HTTPResolver
+from src.utils.url import URL
+from tests.local_server import LocalServer
+
+LOADS = 8
+
+
+class TestSingleFlight(TestCase):
+    def test_followers_share_the_leaders_result(self):
+        flight = SingleFlight()
+        future, leader = flight.join("key")
+        follower_future, follower_leads = flight.join("key")
+        assert leader and not follower_leads
+        assert follower_future is future
+
+        flight.finish("key", future, "result")
+        assert follower_future.result() == "result"
+        # A finished flight is forgotten, so the next caller leads again
+        assert flight.join("key")[1]
+
+    def test_failure_is_shared(self):
+        flight = SingleFlight()
+        future, _ = flight.join("key")
+        flight.fail("key", future, Abandoned())
+        with self.assertRaises(Abandoned):
+            future.result()
+        assert flight.calls == {}
+
+
+class TestHTTPResolverCoalescing(TestCase):
+    def load_concurrently(self, url: URL, cache: BrowserCache, pool: ConnectionPool):
+        barrier = threading.Barrier(LOADS)
+
+        def load(_):
+            barrier.wait()
+            return HTTPResolver(url, cache, pool).resolve()
+
+        with ThreadPoolExecutor(LOADS) as executor:
+            return list(executor.map(load, range(LOADS)))
+
+    def test_concurrent_loads_send_one_request(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60"}, b"shared")}
+        with LocalServer(routes, delay=0.3) as server:
+            pool = ConnectionPool()
+            cache = BrowserCache()
+            results = self.load_concurrently(URL(server.url("/")), cache, pool)
+            assert results == ["shared"] * LOADS
+            assert len(server.requests) == 1
+            assert cache.get_capacity() == 1
+            pool.close()
+
+    def test_uncacheable_responses_are_still_shared(self):
+        routes = {"/": (200, {"Cache-Control": "no-store"}, b"shared")}
+        with LocalServer(routes, delay=0.3) as server:
+            pool = ConnectionPool()
+            results = self.load_concurrently(URL(server.url("/")), BrowserCache(), pool)
+            assert results == ["shared"] * LOADS
+            assert len(server.requests) == 1
+            pool.close()
+
+    def test_errors_are_shared(self):
+        routes = {"/": (404, {}, b"missing")}
+        with LocalServer(routes, delay=0.3) as server:
+            pool = ConnectionPool()
+            url = URL(server.url("/"))
+            with self.assertRaises(AssertionError):
+                self.load_concurrently(url, BrowserCache(), pool)
+            assert len(server.requests) == 1
+            pool.close()
+
+    def test_abandoned_leader_lets_followers_fetch(self):
+        routes = {"/": (200, {}, b"a" * 100_000)}
+        with LocalServer(routes, delay=0.2) as server:
+            pool = ConnectionPool()
+            url = URL(server.url("/"))
+            leader = HTTPResolver(url, BrowserCache(), pool).stream()
+            next(leader)
+            with ThreadPoolExecutor(1) as executor:
+                follower = executor.submit(
+                    HTTPResolver(url, BrowserCache(), pool).resolve
+                )
+                # Let the follower join the leader's flight before it goes away
+                time.sleep(0.05)
+                leader.close()
+                assert follower.result() == "a" * 100_000
+            assert len(server.requests) == 2
+            pool.close()
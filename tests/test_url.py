@@ -41,3 +41,36 @@ class TestFileURL(TestCase):
         file_url = FileURL("file:///home/user/test.txt")
         assert file_url.scheme == Scheme.File
         assert file_url.path == "/home/user/test.txt"
+
+
+class TestResolveURL(TestCase):
+    def test_resolve(self):
+        base = URL("http://example.com/docs/guide/page.html?q=1")
+        assert (
+            str(base.resolve("style.css"))
+            == "http://example.com:80/docs/guide/style.css"
+        )
+        assert (
+            str(base.resolve("../img/a.png#top"))
+            == "http://example.com:80/docs/img/a.png"
+        )
+        assert str(base.resolve("/app.js")) == "http://example.com:80/app.js"
+        assert (
+            str(base.resolve("?q=2"))
+            == "http://example.com:80/docs/guide/page.html?q=2"
+        )
+        assert str(base.resolve("//cdn.example.com/x")) == "http://cdn.example.com:80/x"
+        assert str(base.resolve("https://other.com/")) == "https://other.com:443/"
+        assert str(base.resolve("..")) == "http://example.com:80/docs/"
+
+    def test_resolve_checks_the_scheme(self):
+        base = URL("http://example.com/docs/page.html")
+        assert str(base.resolve("HTTP://Other.com/a")) == "http://Other.com:80/a"
+        assert str(base.resolve("https:other.com/a")) == "https://other.com:443/a"
+        assert (
+            str(base.resolve("http:next.html"))
+            == "http://example.com:80/docs/next.html"
+        )
+        for href in ("mailto:me@example.com", "javascript:void(0)", "data:,x"):
+            with self.assertRaises(ValueError):
+                base.resolve(href)